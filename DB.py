@@ -1,183 +1,522 @@
 import flet as ft
-import pandas as pd
 from flet import FilePicker, FilePickerResultEvent
-from sqlalchemy import create_engine, Column, Integer, String
-from sqlalchemy.orm import sessionmaker, declarative_base
-import os
+import asyncio
+import threading
+import time
+
+from basedatos import (
+    TAMANO_PAGINA, engine, buscar_por_cedula_async, buscar_por_nombre_async, buscar_por_prefijo_async,
+    obtener_cambios_personas_async, obtener_pagina_personas_async, obtener_resumen_async,
+    obtener_version_personas_async,
+)
+from exportador import EXTENSIONES_EXPORTACION, ExportacionCancelada, exportar_personas
+from metricas import UMBRAL_LENTO_MS, limpiar_operaciones, medir, operaciones_lentas
+from vista_combinador import ventana_combinador
+from importador import (
+    EXTENSIONES_EXCEL, EXTENSIONES_PARQUET, TAMANO_LOTE,
+    ArchivoInvalido, ImportacionCancelada, describir_resultado, importar_archivo, importar_archivos,
+)
+
+
+# Fila de encabezados de la tabla de personas
+def encabezado_personas():
+    return ft.Row(
+        controls=[
+            ft.Container(ft.Text("ID", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE), width=60,
+                         bgcolor=ft.colors.BLUE_800),
+            ft.Container(ft.Text("Nombre", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
+                         width=180, bgcolor=ft.colors.BLUE_800),
+            ft.Container(ft.Text("Teléfono", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
+                         width=140, bgcolor=ft.colors.BLUE_800),
+            ft.Container(ft.Text("Correo", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
+                         width=220, bgcolor=ft.colors.BLUE_800),
+            ft.Container(ft.Text("Edad", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE), width=100,
+                         bgcolor=ft.colors.BLUE_800),
+            ft.Container(ft.Text("Cédula", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
+                         width=140, bgcolor=ft.colors.BLUE_800)
+        ],
+        alignment=ft.MainAxisAlignment.START,
+    )
+
 
-# Declarar la base
-Base = declarative_base()
+# Textos que muestra cada celda de la fila de una persona
+def valores_fila_persona(p):
+    return (str(p.id), f"{p.nombre} {p.apellido}", p.telefono, p.correo, str(p.edad), p.cedula)
+
+
+# Fila de la tabla para una persona
+def fila_persona(p):
+    id_, nombre, telefono, correo, edad, cedula = valores_fila_persona(p)
+    return ft.Row(
+        controls=[
+            ft.Container(ft.Text(id_, size=14, color=ft.colors.BLACK), width=60,
+                         bgcolor=ft.colors.CYAN_100, border_radius=5),
+            ft.Container(ft.Text(nombre, size=14, color=ft.colors.BLACK), width=180,
+                         bgcolor=ft.colors.CYAN_100, border_radius=5),
+            ft.Container(ft.Text(telefono, size=14, color=ft.colors.BLACK), width=140,
+                         bgcolor=ft.colors.CYAN_100, border_radius=5),
+            ft.Container(ft.Text(correo, size=14, color=ft.colors.BLACK), width=220,
+                         bgcolor=ft.colors.CYAN_100, border_radius=5),
+            ft.Container(ft.Text(edad, size=14, color=ft.colors.BLACK), width=100,
+                         bgcolor=ft.colors.CYAN_100, border_radius=5),
+            ft.Container(ft.Text(cedula, size=14, color=ft.colors.BLACK), width=140,
+                         bgcolor=ft.colors.CYAN_100, border_radius=5),
+        ],
+        alignment=ft.MainAxisAlignment.START,
+        height=40,
+    )
 
 
-# Definir la clase para la base de datos
-class Persona(Base):
-    __tablename__ = 'personas'
+class TablaPersonas:
+    """Tabla de personas que conserva los controles de cada fila por id.
+
+    sincronizar() solo crea las filas nuevas, cambia el texto de las que cambiaron y quita
+    las que ya no están, así el siguiente page.update() envía al cliente únicamente esas
+    diferencias en lugar de todo el árbol de controles.
+    """
+
+    def __init__(self):
+        self.control = ft.Column(
+            controls=[encabezado_personas()],
+            spacing=5,
+            alignment=ft.MainAxisAlignment.START,
+        )
+        self._filas = {}  # id -> (textos mostrados, ft.Row)
+
+    def sincronizar(self, personas):
+        """Deja en la tabla exactamente estas personas, en este orden.
+
+        No llama a page.update(); devuelve un diccionario con las filas agregadas,
+        actualizadas y quitadas.
+        """
+        cambios = {"agregadas": 0, "actualizadas": 0, "quitadas": 0}
+        filas = {}
+        for p in personas:
+            valores = valores_fila_persona(p)
+            anterior = self._filas.get(p.id)
+            if anterior is None:
+                fila = fila_persona(p)
+                cambios["agregadas"] += 1
+            else:
+                valores_anteriores, fila = anterior
+                if valores != valores_anteriores:
+                    for celda, valor in zip(fila.controls, valores):
+                        celda.content.value = valor
+                    cambios["actualizadas"] += 1
+            filas[p.id] = (valores, fila)
+
+        cambios["quitadas"] = len(self._filas.keys() - filas.keys())
+        self._filas = filas
+        self.control.controls = [self.control.controls[0], *[fila for _, fila in filas.values()]]
+        return cambios
+
+
+# Segundos entre consultas de la actualización automática de la vista de personas
+INTERVALO_AUTOACTUALIZAR = 2
+
+
+# Función para ver personas en el ListView, una página a la vez
+# Los manejadores son async: las consultas corren fuera del bucle de eventos de Flet
+async def ver_personas(page):
+    # id anterior al primer registro de cada página visitada (la primera empieza en 0)
+    inicios = [0]
+    ultimo_id = 0
+    hay_mas = False
+    filas_vista = []  # Filas de la página que se está mostrando
+    en_busqueda = False
+    siguiente = None  # Tarea que precarga la página siguiente
+    tarea_autoactualizar = None
+    # Última versión de la secuencia de cambios ya reflejada en la vista
+    version_vista = await obtener_version_personas_async()
+
+    # Se pide una fila de más para saber si existe una página siguiente
+    async def cargar_pagina(despues_de_id):
+        return await obtener_pagina_personas_async(despues_de_id, TAMANO_PAGINA + 1)
+
+    def mostrar(filas):
+        nonlocal ultimo_id, hay_mas, filas_vista, en_busqueda, siguiente
+        hay_mas = len(filas) > TAMANO_PAGINA
+        filas = filas[:TAMANO_PAGINA]
+        ultimo_id = filas[-1].id if filas else inicios[-1]
+        filas_vista = filas
+        en_busqueda = False
+
+        with medir("vista", filas=len(filas)):
+            tabla.sincronizar(filas)
+        texto_pagina.value = f"Página {len(inicios)}"
+        boton_anterior.disabled = len(inicios) == 1
+        boton_siguiente.disabled = not hay_mas
+
+        # Mientras el usuario mira esta página se trae la siguiente
+        siguiente = asyncio.create_task(cargar_pagina(ultimo_id)) if hay_mas else None
+        with medir("page.update", filas=len(filas)):
+            page.update()
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    nombre = Column(String, nullable=False)
-    apellido = Column(String, nullable=False)
-    telefono = Column(String, nullable=False)
-    correo = Column(String, nullable=False)
-    edad = Column(Integer, nullable=False)
-    cedula = Column(String, unique=True, nullable=False)
+    async def ir_siguiente(e):
+        inicios.append(ultimo_id)
+        mostrar(await (siguiente or cargar_pagina(ultimo_id)))
+
+    async def ir_anterior(e):
+        if len(inicios) > 1:
+            inicios.pop()
+            mostrar(await cargar_pagina(inicios[-1]))
+
+    # Búsqueda indexada; mientras hay resultados se ocultan los botones de página
+    async def buscar(e):
+        nonlocal en_busqueda
+        texto = input_busqueda.value or ""
+        if not texto.strip():
+            await limpiar_busqueda(e)
+            return
+        campo = selector_campo.value
+        if campo == "cedula":
+            resultados = await buscar_por_cedula_async(texto)
+        elif campo in ("telefono", "correo"):
+            resultados = await buscar_por_prefijo_async(campo, texto)
+        else:
+            resultados = await buscar_por_nombre_async(texto)
+
+        en_busqueda = True
+        with medir("vista", filas=len(resultados)):
+            tabla.sincronizar(resultados)
+        texto_pagina.value = f"{len(resultados)} resultado(s)"
+        boton_anterior.disabled = True
+        boton_siguiente.disabled = True
+        with medir("page.update", filas=len(resultados)):
+            page.update()
 
-    def __repr__(self):
-        return f"<Persona(id={self.id}, nombre={self.nombre}, apellido={self.apellido}, telefono={self.telefono}, correo={self.correo}, edad={self.edad}, cedula={self.cedula})>"
+    async def limpiar_busqueda(e):
+        input_busqueda.value = ""
+        inicios[1:] = []
+        mostrar(await cargar_pagina(0))
+
+    # Volver a leer la página actual; solo viajan al cliente las filas que cambiaron
+    async def refrescar(e):
+        mostrar(await cargar_pagina(inicios[-1]))
+
+    # Aplica a la página solo las filas que cambiaron desde version_vista
+    async def aplicar_cambios():
+        nonlocal version_vista, ultimo_id, hay_mas, filas_vista, siguiente
+        # En la última página también pueden aparecer filas nuevas (ids mayores)
+        hasta_id = ultimo_id if hay_mas else None
+        inicio, pagina = inicios[-1], len(inicios)
+        version, cambiadas, borradas = await obtener_cambios_personas_async(version_vista, inicio, hasta_id)
+        # Si mientras tanto el usuario cambió de página o buscó, los cambios son de otra
+        # página; se descartan y la próxima revisión los vuelve a pedir
+        if (inicios[-1], len(inicios)) != (inicio, pagina) or en_busqueda:
+            return
+        if version == version_vista:
+            return
+        version_vista = version
+        if not cambiadas and not borradas:
+            return
+        texto_autoactualizar.value = f"{len(cambiadas) + len(borradas)} cambio(s) a las {time.strftime('%H:%M:%S')}"
+        # La página precargada pudo quedar desactualizada
+        siguiente = None
+        if borradas:
+            # Al quitar filas hay que completar la página con las siguientes
+            mostrar(await cargar_pagina(inicios[-1]))
+            return
+        por_id = {fila.id: fila for fila in filas_vista}
+        por_id.update((fila.id, fila) for fila in cambiadas)
+        filas = sorted(por_id.values(), key=lambda fila: fila.id)
+        if len(filas) > TAMANO_PAGINA:
+            filas = filas[:TAMANO_PAGINA]
+            ultimo_id = filas[-1].id
+            hay_mas = True
+            boton_siguiente.disabled = False
+        filas_vista = filas
+        with medir("vista", filas=len(cambiadas)):
+            tabla.sincronizar(filas)
+        with medir("page.update", filas=len(cambiadas)):
+            page.update()
 
+    # Mientras el interruptor esté encendido y la vista abierta, revisa la versión cada
+    # INTERVALO_AUTOACTUALIZAR segundos; si nada cambió solo se lee el contador
+    async def autoactualizar():
+        while interruptor_autoactualizar.value and tabla.control in page.controls:
+            await asyncio.sleep(INTERVALO_AUTOACTUALIZAR)
+            if interruptor_autoactualizar.value and tabla.control in page.controls:
+                await aplicar_cambios()
+
+    async def cambiar_autoactualizar(e):
+        nonlocal tarea_autoactualizar
+        texto_autoactualizar.value = ""
+        if interruptor_autoactualizar.value and (tarea_autoactualizar is None or tarea_autoactualizar.done()):
+            tarea_autoactualizar = asyncio.create_task(autoactualizar())
+        page.update()
 
-# Crear la base de datos en SQLite
-db_file = 'personas.db'
-if not os.path.exists(db_file):
-    engine = create_engine(f'sqlite:///{db_file}')
-    Base.metadata.create_all(engine)
-else:
-    engine = create_engine(f'sqlite:///{db_file}')
+    # Exportación de toda la tabla al archivo elegido; el trabajo corre en un hilo aparte
+    async def exportar(e: FilePickerResultEvent):
+        if not e.path or exportando.is_set():
+            return
+        ruta = e.path
+        if not ruta.lower().endswith(EXTENSIONES_EXPORTACION):
+            ruta += ".xlsx"
+        exportando.set()
+        cancelacion_exportacion.clear()
+        boton_exportar.disabled = True
+        boton_cancelar_exportacion.visible = True
+        barra_exportacion.value = 0
+        barra_exportacion.visible = True
+        texto_exportacion.value = "Exportando..."
+        page.update()
 
-# Crear la sesión
-Session = sessionmaker(bind=engine)
-session = Session()
+        def al_avanzar(hechas, total):
+            if total:
+                barra_exportacion.value = min(hechas / total, 1)
+            texto_exportacion.value = f"Exportando {hechas:,} / {total:,} filas..."
+            page.update()
 
+        try:
+            resultado = await asyncio.to_thread(
+                exportar_personas, ruta, al_avanzar=al_avanzar, cancelacion=cancelacion_exportacion
+            )
+            texto_exportacion.value = (
+                f"{resultado['filas']:,} filas exportadas a '{ruta}' en {resultado['segundos']:.2f} s."
+            )
+        except ExportacionCancelada:
+            texto_exportacion.value = "Exportación cancelada."
+        except Exception as e:
+            texto_exportacion.value = f"Error: {str(e)}"
+        finally:
+            exportando.clear()
+            boton_exportar.disabled = False
+            boton_cancelar_exportacion.visible = False
+            barra_exportacion.visible = False
+            page.update()
 
-# Función para ver personas en el ListView
-def ver_personas(page):
-    personas = session.query(Persona).all()
+    def cancelar_exportacion(e):
+        if exportando.is_set():
+            cancelacion_exportacion.set()
+            texto_exportacion.value = "Cancelando..."
+            page.update()
 
-    list_view = ft.Column(
-        controls=[
-            ft.Row(
-                controls=[
-                    ft.Container(ft.Text("ID", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE), width=60,
-                                 bgcolor=ft.colors.BLUE_800),
-                    ft.Container(ft.Text("Nombre", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
-                                 width=180, bgcolor=ft.colors.BLUE_800),
-                    ft.Container(ft.Text("Teléfono", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
-                                 width=140, bgcolor=ft.colors.BLUE_800),
-                    ft.Container(ft.Text("Correo", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
-                                 width=220, bgcolor=ft.colors.BLUE_800),
-                    ft.Container(ft.Text("Edad", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE), width=100,
-                                 bgcolor=ft.colors.BLUE_800),
-                    ft.Container(ft.Text("Cédula", size=16, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
-                                 width=140, bgcolor=ft.colors.BLUE_800)
-                ],
-                alignment=ft.MainAxisAlignment.START,
-            ),
-            *[
-                ft.Row(
-                    controls=[
-                        ft.Container(ft.Text(str(p.id), size=14, color=ft.colors.BLACK), width=60,
-                                     bgcolor=ft.colors.CYAN_100, border_radius=5),
-                        ft.Container(ft.Text(f"{p.nombre} {p.apellido}", size=14, color=ft.colors.BLACK), width=180,
-                                     bgcolor=ft.colors.CYAN_100, border_radius=5),
-                        ft.Container(ft.Text(p.telefono, size=14, color=ft.colors.BLACK), width=140,
-                                     bgcolor=ft.colors.CYAN_100, border_radius=5),
-                        ft.Container(ft.Text(p.correo, size=14, color=ft.colors.BLACK), width=220,
-                                     bgcolor=ft.colors.CYAN_100, border_radius=5),
-                        ft.Container(ft.Text(str(p.edad), size=14, color=ft.colors.BLACK), width=100,
-                                     bgcolor=ft.colors.CYAN_100, border_radius=5),
-                        ft.Container(ft.Text(p.cedula, size=14, color=ft.colors.BLACK), width=140,
-                                     bgcolor=ft.colors.CYAN_100, border_radius=5),
-                    ],
-                    alignment=ft.MainAxisAlignment.START,
-                    height=40,
-                ) for p in personas
-            ]
+    exportando = threading.Event()
+    cancelacion_exportacion = threading.Event()
+    selector_exportacion = FilePicker(on_result=exportar)
+    page.overlay.append(selector_exportacion)
+
+    tabla = TablaPersonas()
+    texto_pagina = ft.Text("Página 1")
+    input_busqueda = ft.TextField(label="Buscar", width=260, on_submit=buscar)
+    selector_campo = ft.Dropdown(
+        width=160,
+        value="nombre",
+        options=[
+            ft.dropdown.Option("nombre", "Nombre"),
+            ft.dropdown.Option("cedula", "Cédula"),
+            ft.dropdown.Option("telefono", "Teléfono"),
+            ft.dropdown.Option("correo", "Correo"),
         ],
-        spacing=5,
-        alignment=ft.MainAxisAlignment.START,
     )
+    boton_anterior = ft.IconButton(ft.icons.ARROW_BACK, on_click=ir_anterior, disabled=True)
+    boton_siguiente = ft.IconButton(ft.icons.ARROW_FORWARD, on_click=ir_siguiente, disabled=True)
+    boton_exportar = ft.ElevatedButton(
+        "Exportar",
+        on_click=lambda _: selector_exportacion.save_file(
+            file_name="personas.xlsx",
+            allowed_extensions=[ext.lstrip(".") for ext in EXTENSIONES_EXPORTACION],
+        ),
+    )
+    boton_cancelar_exportacion = ft.ElevatedButton("Cancelar exportación", on_click=cancelar_exportacion, visible=False)
+    barra_exportacion = ft.ProgressBar(width=300, value=0, visible=False)
+    texto_exportacion = ft.Text(value="", size=12)
+    interruptor_autoactualizar = ft.Switch(label="Actualizar automáticamente", value=True,
+                                           on_change=cambiar_autoactualizar)
+    texto_autoactualizar = ft.Text(value="", size=12)
 
     page.clean()
-    page.add(list_view)
+    page.add(
+        ft.Row(
+            [
+                input_busqueda,
+                selector_campo,
+                ft.ElevatedButton("Buscar", on_click=buscar),
+                ft.ElevatedButton("Limpiar", on_click=limpiar_busqueda),
+                ft.IconButton(ft.icons.REFRESH, on_click=refrescar, tooltip="Actualizar"),
+                boton_exportar,
+                interruptor_autoactualizar,
+                texto_autoactualizar,
+            ],
+            alignment=ft.MainAxisAlignment.START,
+        ),
+        ft.Row([barra_exportacion, texto_exportacion, boton_cancelar_exportacion],
+               alignment=ft.MainAxisAlignment.START),
+        tabla.control,
+        ft.Row([boton_anterior, texto_pagina, boton_siguiente], alignment=ft.MainAxisAlignment.START),
+    )
+    mostrar(await cargar_pagina(0))
+    tarea_autoactualizar = asyncio.create_task(autoactualizar())
 
 
 # Función para cargar datos de Excel a la base de datos
 # Función para cargar los datos de un archivo Excel a la base de datos
 def cargar_excel_a_bd(page):
     # Variable global
-    archivo_excel = None
+    archivos_seleccionados = []
+
+    # Estado de la carga en segundo plano
+    importando = threading.Event()
+    cancelacion = threading.Event()
 
     # Configurar el FilePicker
     def seleccionar_archivo_excel(e: FilePickerResultEvent):
-        nonlocal archivo_excel
+        nonlocal archivos_seleccionados
         if e.files:
-            archivo_excel = e.files[0].path
-            mensaje.value = f"Archivo Excel seleccionado: {archivo_excel}"
+            archivos_seleccionados = [archivo.path for archivo in e.files]
+            if len(archivos_seleccionados) == 1:
+                mensaje.value = f"Archivo seleccionado: {archivos_seleccionados[0]}"
+            else:
+                mensaje.value = f"Archivos seleccionados: {len(archivos_seleccionados)}"
+            # Con varios archivos cada uno se lee completo en su proceso, así que la
+            # lectura en streaming no aplica
+            check_streaming.disabled = len(archivos_seleccionados) > 1
+            if check_streaming.disabled:
+                check_streaming.value = False
         else:
             mensaje.value = "Ningún archivo seleccionado."
         page.update()
 
-    # Función para cargar los datos a la base de datos
-    def cargar_datos(e):
-        if archivo_excel is None:
-            mensaje.value = "Por favor, selecciona un archivo Excel."
-            page.update()
-            return
-
+    # Lectura e inserción: el trabajo pesado corre en un hilo aparte y se espera sin
+    # bloquear el bucle de eventos; los avisos de progreso llegan desde ese hilo
+    async def ejecutar_importacion(rutas, tamano_lote, streaming, upsert, forzar):
         try:
-            # Cargar el archivo Excel y eliminar espacios en los nombres de las columnas
-            df = pd.read_excel(archivo_excel, engine="openpyxl")
-
-            # Eliminar espacios en los nombres de las columnas
-            df.columns = df.columns.str.strip()
+            inicio = time.perf_counter()
+
+            if len(rutas) > 1:
+                # Varios archivos: se leen en paralelo y se informa cada uno al terminar
+                lineas = []
+
+                def al_terminar_archivo(ruta, resultado, hechos, total):
+                    lineas.append(describir_resultado(ruta, resultado))
+                    barra_progreso.value = hechos / total
+                    transcurrido = time.perf_counter() - inicio
+                    eta = transcurrido / hechos * (total - hechos)
+                    texto_progreso.value = f"{hechos} / {total} archivos - quedan {eta:.0f} s"
+                    mensaje.value = "\n".join(lineas)
+                    page.update()
 
-            # Convertir todas las columnas a minúsculas para evitar problemas de mayúsculas/minúsculas
-            df.columns = df.columns.str.lower()
+                await asyncio.to_thread(
+                    importar_archivos, rutas, engine, tamano_lote, streaming, upsert,
+                    al_terminar_archivo=al_terminar_archivo, cancelacion=cancelacion, forzar=forzar,
+                )
+                return
+            ruta = rutas[0]
+
+            def al_avanzar(hechas, total):
+                transcurrido = time.perf_counter() - inicio
+                if total:
+                    barra_progreso.value = min(hechas / total, 1)
+                    eta = transcurrido / hechas * max(total - hechas, 0)
+                    texto_progreso.value = f"{hechas:,} / {total:,} filas - quedan {eta:.0f} s"
+                else:
+                    texto_progreso.value = f"{hechas:,} filas"
+                page.update()
 
-            # Mostrar las columnas del archivo para verificar
-            print(f"Columnas en el archivo Excel: {df.columns.tolist()}")
+            resultado = await asyncio.to_thread(
+                importar_archivo, ruta, engine, tamano_lote, streaming, upsert,
+                al_avanzar=al_avanzar, cancelacion=cancelacion, forzar=forzar,
+            )
+            mensaje.value = describir_resultado(ruta, resultado)
+        except ArchivoInvalido as e:
+            mensaje.value = str(e)
+        except ImportacionCancelada:
+            if len(rutas) > 1:
+                mensaje.value += "\nCarga cancelada. Los archivos que no aparecen arriba no se guardaron."
+            else:
+                mensaje.value = "Carga cancelada. No se guardó ningún cambio en la base de datos."
+        except Exception as e:
+            mensaje.value = f"Error: {str(e)}"
+        finally:
+            importando.clear()
+            boton_cargar_datos.disabled = False
+            boton_cancelar.disabled = True
+            barra_progreso.visible = False
+            page.update()
 
-            # Verificar si todas las columnas necesarias están presentes (ignorando mayúsculas/minúsculas)
-            columnas_requeridas = ["nombre", "apellido", "telefono", "correo", "edad", "cedula"]
-            if not all(col in df.columns for col in columnas_requeridas):
-                mensaje.value = "El archivo Excel debe contener las columnas: 'nombre', 'apellido', 'telefono', 'correo', 'edad', 'cedula'."
-                page.update()
-                return
+    # Función para cargar los datos a la base de datos
+    async def cargar_datos(e):
+        if importando.is_set():
+            mensaje.value = "Ya hay una carga en curso. Espera a que termine o cancélala."
+            page.update()
+            return
 
-            # Crear una sesión de base de datos
-            DATABASE_URL = "sqlite:///mi_base_de_datos.db"  # Cambia esto a tu base de datos
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
-            session = Session()
-
-            # Cargar cada fila a la base de datos
-            for _, row in df.iterrows():
-                persona = Persona(
-                    nombre=row["nombre"],
-                    apellido=row["apellido"],
-                    telefono=row["telefono"],
-                    correo=row["correo"],
-                    edad=row["edad"],
-                    cedula=row["cedula"]
-                )
-                session.add(persona)
+        if not archivos_seleccionados:
+            mensaje.value = "Por favor, selecciona al menos un archivo Excel, CSV o Parquet."
+            page.update()
+            return
 
-            # Confirmar los cambios en la base de datos
-            session.commit()
+        # Leer el tamaño de lote indicado por el usuario
+        try:
+            tamano_lote = int(input_tamano_lote.value)
+            if tamano_lote < 1:
+                raise ValueError
+        except ValueError:
+            mensaje.value = "El tamaño de lote debe ser un número entero mayor que 0."
+            page.update()
+            return
 
-            mensaje.value = f"Datos cargados exitosamente desde {archivo_excel} a la base de datos."
-        except Exception as e:
-            mensaje.value = f"Error: {str(e)}"
+        # Bloquear una segunda carga mientras esta no termine
+        importando.set()
+        cancelacion.clear()
+        boton_cargar_datos.disabled = True
+        boton_cancelar.disabled = False
+        barra_progreso.value = None  # Indeterminada mientras se lee el archivo
+        barra_progreso.visible = True
+        texto_progreso.value = "Leyendo archivos..."
+        mensaje.value = f"Cargando {len(archivos_seleccionados)} archivo(s)..."
         page.update()
 
+        await ejecutar_importacion(
+            list(archivos_seleccionados), tamano_lote, check_streaming.value, check_upsert.value, check_forzar.value
+        )
+
+    # Función para cancelar la carga en curso
+    def cancelar_carga(e):
+        if importando.is_set():
+            cancelacion.set()
+            texto_progreso.value = "Cancelando..."
+            page.update()
+
     # Configuración de los controles de la interfaz gráfica con Flet
     file_picker = FilePicker(on_result=seleccionar_archivo_excel)
     page.overlay.append(file_picker)
 
     # Elementos de la interfaz
-    mensaje = ft.Text(value="Selecciona un archivo Excel para cargar los datos.", color="blue")
+    mensaje = ft.Text(value="Selecciona un archivo Excel, CSV o Parquet para cargar los datos.", color="blue")
+    input_tamano_lote = ft.TextField(label="Filas por lote", value=str(TAMANO_LOTE), width=200)
+    check_streaming = ft.Checkbox(label="Lectura de Excel en streaming (memoria constante)", value=False)
+    check_upsert = ft.Checkbox(label="Actualizar personas existentes por cédula", value=False)
+    check_forzar = ft.Checkbox(label="Importar aunque el archivo ya se haya cargado", value=False)
     boton_seleccionar_archivo = ft.ElevatedButton(
-        "Seleccionar archivo Excel", on_click=lambda _: file_picker.pick_files()
+        "Seleccionar archivos (Excel, CSV o Parquet)",
+        on_click=lambda _: file_picker.pick_files(
+            allow_multiple=True,
+            allowed_extensions=[ext.lstrip(".") for ext in (*EXTENSIONES_EXCEL, ".csv", *EXTENSIONES_PARQUET)]
+        ),
     )
     boton_cargar_datos = ft.ElevatedButton(
         "Cargar Datos a la Base de Datos", on_click=cargar_datos
     )
+    boton_cancelar = ft.ElevatedButton(
+        "Cancelar carga", on_click=cancelar_carga, disabled=True
+    )
+    barra_progreso = ft.ProgressBar(width=400, value=0, visible=False)
+    texto_progreso = ft.Text(value="", size=12)
 
     # Contenido de la ventana de carga de datos
     contenido_carga_datos = ft.Column(
         [
             mensaje,
             boton_seleccionar_archivo,
-            boton_cargar_datos,
+            input_tamano_lote,
+            check_streaming,
+            check_upsert,
+            check_forzar,
+            ft.Row([boton_cargar_datos, boton_cancelar], alignment=ft.MainAxisAlignment.CENTER),
+            barra_progreso,
+            texto_progreso,
         ],
         alignment=ft.MainAxisAlignment.CENTER,
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -187,223 +526,134 @@ def cargar_excel_a_bd(page):
     page.add(contenido_carga_datos)
 
 
-# Función para la ventana principal (Home)
-def ventana_home(page):
-    title = ft.Text("Bienvenido a DigiWork Solutions", size=30, weight=ft.FontWeight.BOLD, color=ft.colors.CYAN_600)
+# Función para ver el tablero de estadísticas de personas
+async def ver_estadisticas(page):
+    resumen = await obtener_resumen_async()
+    total = resumen["total"]
 
-    # Botones para navegar
-    btn_ver_datos = ft.ElevatedButton("Ver Datos", on_click=lambda _: ver_personas(page), bgcolor=ft.colors.PINK_400,
-                                      color=ft.colors.WHITE)
-    btn_excel_unificado = ft.ElevatedButton("Excel Unificado", on_click=lambda _: combinar_archivos(page),
-                                            bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
-    btn_cargar_excel_bd = ft.ElevatedButton("Cargar Excel a Base de Datos", on_click=lambda _: cargar_excel_a_bd(page),
-                                            bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
-    btn_salir = ft.ElevatedButton("Salir", on_click=lambda _: page.window_close(), bgcolor=ft.colors.RED_500,
-                                  color=ft.colors.WHITE)
-
-    page.add(title, btn_ver_datos, btn_excel_unificado, btn_cargar_excel_bd, btn_salir)
+    # Una barra por grupo, proporcional al total de personas
+    def barras(grupos):
+        return [
+            ft.Row(
+                [
+                    ft.Text(nombre, width=160),
+                    ft.ProgressBar(value=cantidad / total if total else 0, width=300, color=ft.colors.BLUE_800),
+                    ft.Text(f"{cantidad:,}"),
+                ],
+                alignment=ft.MainAxisAlignment.START,
+            )
+            for nombre, cantidad in grupos
+        ]
 
+    promedio = resumen["promedio_edad"]
+    contenido = ft.Column(
+        [
+            ft.Text("Estadísticas de personas", size=24, weight=ft.FontWeight.BOLD, color=ft.colors.CYAN_600),
+            ft.Text(f"Total de personas: {total:,}", size=16),
+            ft.Text(f"Edad promedio: {promedio:.1f} años" if promedio is not None else "Edad promedio: -", size=16),
+            ft.Text("Personas por rango de edad", size=18, weight=ft.FontWeight.BOLD),
+            *barras(resumen["edades"]),
+            ft.Text("Dominios de correo más usados", size=18, weight=ft.FontWeight.BOLD),
+            *barras(resumen["dominios"]),
+        ],
+        spacing=8,
+        alignment=ft.MainAxisAlignment.START,
+    )
 
-def combinar_archivos(page: ft.Page):
-    """Función principal para la interfaz gráfica de la ruta /exceloption"""
-    page.title = "Combinador de Archivos Excel"
-    page.theme_mode = "light"
-    page.padding = 20
+    page.clean()
+    page.add(contenido)
 
-    # Variables para almacenar las rutas de los archivos y la carpeta de destino
-    archivos = []
-    carpeta_destino = None
-    num_hoas = 0  # Definimos esta variable aquí para poder usarla en las funciones internas
 
-    # Función para combinar archivos
-    def combinar_archivos(e):
-        nonlocal num_hoas, archivos, carpeta_destino  # Asegúrate de usar nonlocal si necesitas modificar las variables fuera de la función
-        if len(archivos) < num_hoas:
-            mensaje.value = f"Por favor, selecciona {num_hoas} archivos."
-            page.update()
-            return
-        if not carpeta_destino:
-            mensaje.value = "Por favor, selecciona una carpeta de destino."
-            page.update()
-            return
+# Función para ver las operaciones recientes que tardaron más que el umbral indicado
+def ver_operaciones_lentas(page):
 
+    def filas_tabla():
         try:
-            # Verificar si openpyxl está instalado
-            try:
-                import openpyxl
-            except ImportError:
-                mensaje.value = "Error: 'openpyxl' no está instalado. Ejecuta 'pip install openpyxl'."
-                page.update()
-                return
-
-            # Cargar los archivos Excel
-            dfs = []
-            for archivo in archivos:
-                try:
-                    df = pd.read_excel(archivo, engine="openpyxl")
-                    dfs.append(df)
-                except Exception as e:
-                    mensaje.value = f"Error al leer el archivo {archivo}: {str(e)}"
-                    page.update()
-                    return
-
-            # Determinar el número mínimo de filas entre todos los DataFrames
-            num_filas = min(len(df) for df in dfs)
-
-            # Truncar todos los DataFrames para que tengan el mismo número de filas
-            dfs = [df.head(num_filas) for df in dfs]
-
-            # Combinar los DataFrames basados en el índice (orden de las filas)
-            df_final = dfs[0]
-            for df in dfs[1:]:
-                # Renombrar columnas duplicadas para evitar conflictos
-                columnas_duplicadas = set(df_final.columns) & set(df.columns)
-                df = df.rename(columns={col: f"{col}_df{dfs.index(df) + 1}" for col in columnas_duplicadas})
-                # Combinar los DataFrames
-                df_final = df_final.join(df)
-
-            # Guardar en un nuevo archivo Excel
-            archivo_salida = f"{carpeta_destino}/archivo_combinado.xlsx"
-            df_final.to_excel(archivo_salida, index=False, engine="openpyxl")
-            mensaje.value = f"¡Archivo combinado guardado como '{archivo_salida}'!"
-        except Exception as e:
-            mensaje.value = f"Error: {str(e)}"
-        page.update()
-
-    # Función para manejar la selección de archivos
-    def seleccionar_archivo(e: ft.FilePickerResultEvent):
-        nonlocal archivos  # Asegúrate de que 'archivos' sea modificable
-        if e.files:
-            archivos.append(e.files[0].path)
-            mensaje.value = f"Archivos seleccionados: {len(archivos)}/{num_hoas}"
-            if len(archivos) == num_hoas:
-                boton_seleccionar_archivo.disabled = True  # Deshabilitar el botón de selección
-                boton_combinar.disabled = False  # Habilitar el botón de combinar
-            page.update()
-        else:
-            mensaje.value = "Ningún archivo seleccionado."
-        page.update()
-
-    # Función para manejar la selección de la carpeta de destino
-    def seleccionar_carpeta_destino(e: ft.FilePickerResultEvent):
-        nonlocal carpeta_destino  # Asegúrate de que 'carpeta_destino' sea modificable
-        if e.path:
-            carpeta_destino = e.path
-            mensaje.value = f"Carpeta de destino seleccionada: {carpeta_destino}"
-            if len(archivos) == num_hoas:
-                boton_combinar.disabled = False  # Habilitar el botón de combinar
-        else:
-            mensaje.value = "Ninguna carpeta seleccionada."
+            umbral = float(input_umbral.value)
+        except ValueError:
+            umbral = UMBRAL_LENTO_MS
+        return [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(f"{op['fecha']:%H:%M:%S}")),
+                ft.DataCell(ft.Text(op["operacion"])),
+                ft.DataCell(ft.Text(f"{op['milisegundos']:.1f}")),
+                ft.DataCell(ft.Text("-" if op["filas"] is None else f"{op['filas']:,}")),
+                ft.DataCell(ft.Text(op["detalle"] or "", size=11, tooltip=op["detalle"])),
+            ])
+            for op in operaciones_lentas(umbral)
+        ]
+
+    def actualizar(e):
+        tabla.rows = filas_tabla()
         page.update()
 
-    # Función para retroceder
-    def retroceder(e):
-        nonlocal num_hoas, archivos  # Modificamos num_hoas y archivos para restablecerlos
-        num_hoas = 0
-        archivos = []
-        mensaje.value = "Selecciona cuántas hojas deseas unir."
-        boton_seleccionar_archivo.disabled = False  # Habilitar el botón de selección
-        boton_combinar.disabled = True  # Deshabilitar el botón de combinar
-        page.controls.clear()
-        page.add(contenido_inicial)
-        page.update()
+    def limpiar(e):
+        limpiar_operaciones()
+        actualizar(e)
+
+    input_umbral = ft.TextField(label="Umbral (ms)", value=str(UMBRAL_LENTO_MS), width=140, on_submit=actualizar)
+    tabla = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("Hora")),
+            ft.DataColumn(ft.Text("Operación")),
+            ft.DataColumn(ft.Text("ms"), numeric=True),
+            ft.DataColumn(ft.Text("Filas"), numeric=True),
+            ft.DataColumn(ft.Text("Detalle")),
+        ],
+        rows=[],
+        border=ft.border.all(1, ft.colors.BLUE_GREY_400),
+        column_spacing=20,
+    )
+    tabla.rows = filas_tabla()
 
-    # Función para avanzar a la selección de archivos
-    def avanzar_seleccion_archivos():
-        nonlocal num_hoas  # Aseguramos que num_hoas es modificable
-        try:
-            num_hoas = int(input_hoas.value)
-            if num_hoas < 1:
-                mensaje.value = "El número de hojas debe ser al menos 1."
-                page.update()
-                return
-            mensaje.value = f"Selecciona {num_hoas} archivos."
-            page.controls.clear()
-            page.add(
-                ft.Column(
-                    [
-                        mensaje,
-                        ft.Row([boton_retroceder], alignment=ft.MainAxisAlignment.CENTER),
-                        ft.Row([boton_seleccionar_archivo], alignment=ft.MainAxisAlignment.CENTER),
-                        ft.Row([boton_seleccionar_carpeta], alignment=ft.MainAxisAlignment.CENTER),
-                        ft.Row([boton_combinar], alignment=ft.MainAxisAlignment.CENTER),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                )
-            )
-            boton_seleccionar_archivo.disabled = False  # Habilitar el botón de selección
-        except ValueError:
-            mensaje.value = "Por favor, ingresa un número válido."
-        page.update()
+    contenido = ft.Column(
+        [
+            ft.Text("Operaciones lentas", size=24, weight=ft.FontWeight.BOLD, color=ft.colors.CYAN_600),
+            ft.Row(
+                [
+                    input_umbral,
+                    ft.IconButton(ft.icons.REFRESH, on_click=actualizar, tooltip="Actualizar"),
+                    ft.IconButton(ft.icons.DELETE_OUTLINE, on_click=limpiar, tooltip="Vaciar registro"),
+                ],
+                alignment=ft.MainAxisAlignment.START,
+            ),
+            ft.Column([tabla], scroll=ft.ScrollMode.AUTO, expand=True),
+        ],
+        expand=True,
+    )
 
-    # Función para ir a la vista de ExcelOption
-    def ir_a_exceloption(e):
-        page.go("/excelOption")
+    page.clean()
+    page.add(contenido)
 
-    # Configurar el FilePicker
-    file_picker = ft.FilePicker(on_result=seleccionar_archivo)
-    folder_picker = ft.FilePicker(on_result=seleccionar_carpeta_destino)
-    page.overlay.extend([file_picker, folder_picker])
 
-    # Elementos de la interfaz
-    mensaje = ft.Text(value="Selecciona cuántas hojas deseas unir.", color="blue")
-    input_hoas = ft.TextField(label="Número de hojas", width=200)
-    boton_confirmar_hoas = ft.ElevatedButton(
-        "Confirmar",
-        on_click=lambda e: avanzar_seleccion_archivos(),
-    )
-    boton_retroceder = ft.ElevatedButton(
-        "Retroceder",
-        on_click=retroceder,
-    )
-    boton_seleccionar_archivo = ft.ElevatedButton(
-        "Seleccionar Archivo",
-        on_click=lambda _: file_picker.pick_files(),
-        disabled=True,  # Deshabilitado inicialmente
-    )
-    boton_seleccionar_carpeta = ft.ElevatedButton(
-        "Seleccionar Carpeta de Destino",
-        on_click=lambda _: folder_picker.get_directory_path(),
-    )
-    boton_combinar = ft.ElevatedButton(
-        "Combinar Archivos",
-        on_click=combinar_archivos,
-        disabled=True,  # Deshabilitado inicialmente
-    )
+# Función para abrir el combinador de archivos Excel; la pantalla es la misma de main.py,
+# que la usa como vista de su ruta /excelOption, así que aquí se muestra su contenido
+def abrir_combinador(page):
+    vista = ventana_combinador(page)
+    page.clean()
+    page.add(*vista.controls)
 
-    # Botón para ir a la ruta /exceloption
-    boton_ir_a_exceloption = ft.ElevatedButton(
-        "Ir a ExcelOption",
-        on_click=ir_a_exceloption,
-    )
 
-    boton_volver = ft.ElevatedButton(
-        "Volver",
-        on_click=lambda _: page.go("/"),
-        style=ft.ButtonStyle(
-            bgcolor=ft.colors.RED_500,
-            color=ft.colors.WHITE,
-            shape=ft.RoundedRectangleBorder(radius=8),
-            padding=ft.padding.all(12),
-        ),
-    )
+# Función para la ventana principal (Home)
+def ventana_home(page):
+    title = ft.Text("Bienvenido a DigiWork Solutions", size=30, weight=ft.FontWeight.BOLD, color=ft.colors.CYAN_600)
 
-    # Contenido inicial
-    contenido_inicial = ft.Column(
-        [
-            mensaje,
-            input_hoas,
-            ft.Row([boton_confirmar_hoas, boton_retroceder], alignment=ft.MainAxisAlignment.CENTER),
-            boton_ir_a_exceloption,  # Añadir el botón de redirección
-            boton_volver
-        ],
-        alignment=ft.MainAxisAlignment.CENTER,
-        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-    )
+    # Botones para navegar
+    btn_ver_datos = ft.ElevatedButton("Ver Datos", on_click=lambda _: page.run_task(ver_personas, page),
+                                      bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
+    btn_excel_unificado = ft.ElevatedButton("Excel Unificado", on_click=lambda _: abrir_combinador(page),
+                                            bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
+    btn_cargar_excel_bd = ft.ElevatedButton("Cargar Excel a Base de Datos", on_click=lambda _: cargar_excel_a_bd(page),
+                                            bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
+    btn_estadisticas = ft.ElevatedButton("Estadísticas", on_click=lambda _: page.run_task(ver_estadisticas, page),
+                                         bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
+    btn_operaciones = ft.ElevatedButton("Operaciones Lentas", on_click=lambda _: ver_operaciones_lentas(page),
+                                        bgcolor=ft.colors.PINK_400, color=ft.colors.WHITE)
+    btn_salir = ft.ElevatedButton("Salir", on_click=lambda _: page.window_close(), bgcolor=ft.colors.RED_500,
+                                  color=ft.colors.WHITE)
 
-    # Iniciar la ventana con el contenido inicial
-    return ft.View("/excelOption", [contenido_inicial])
+    page.add(title, btn_ver_datos, btn_excel_unificado, btn_cargar_excel_bd, btn_estadisticas, btn_operaciones,
+             btn_salir)
 
 
 # Función principal de la aplicación
@@ -412,4 +662,5 @@ def main(page):
 
 
 # Iniciar la aplicación
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main)
@@ -0,0 +1,426 @@
+from sqlalchemy import create_engine, event, select, Column, DateTime, Float, Integer, String, text
+from sqlalchemy.orm import declarative_base
+import asyncio
+import os
+
+from metricas import instrumentar_motor
+
+# Declarar la base
+Base = declarative_base()
+
+
+# Definir la clase para la base de datos
+class Persona(Base):
+    __tablename__ = 'personas'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nombre = Column(String, nullable=False)
+    apellido = Column(String, nullable=False)
+    telefono = Column(String, nullable=False, index=True)
+    correo = Column(String, nullable=False, index=True)
+    edad = Column(Integer, nullable=False)
+    cedula = Column(String, unique=True, nullable=False)
+    # Número de cambio en que se insertó o modificó la fila por última vez (ver SENTENCIAS_VERSION)
+    version = Column(Integer, index=True)
+
+    def __repr__(self):
+        return f"<Persona(id={self.id}, nombre={self.nombre}, apellido={self.apellido}, telefono={self.telefono}, correo={self.correo}, edad={self.edad}, cedula={self.cedula})>"
+
+
+# Registro de los archivos ya importados, para no volver a cargar el mismo contenido
+class Importacion(Base):
+    __tablename__ = 'importaciones'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    hash_contenido = Column(String, nullable=False, index=True)
+    archivo = Column(String, nullable=False)
+    tamano = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    filas = Column(Integer, nullable=False)
+    insertadas = Column(Integer, nullable=False)
+    actualizadas = Column(Integer, nullable=False)
+    sin_cambios = Column(Integer, nullable=False)
+    rechazadas = Column(Integer, nullable=False)
+    fecha = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<Importacion(id={self.id}, archivo={self.archivo}, hash_contenido={self.hash_contenido}, filas={self.filas}, fecha={self.fecha})>"
+
+
+# Índice de texto completo sobre nombre y apellido. Es una tabla FTS5 de contenido externo:
+# solo guarda el índice y los triggers la mantienen al día con cada insert, update o delete.
+SENTENCIAS_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS personas_fts USING fts5(
+        nombre, apellido, content='personas', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS personas_fts_insert AFTER INSERT ON personas BEGIN
+        INSERT INTO personas_fts(rowid, nombre, apellido) VALUES (new.id, new.nombre, new.apellido);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS personas_fts_delete AFTER DELETE ON personas BEGIN
+        INSERT INTO personas_fts(personas_fts, rowid, nombre, apellido) VALUES ('delete', old.id, old.nombre, old.apellido);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS personas_fts_update AFTER UPDATE OF nombre, apellido ON personas BEGIN
+        INSERT INTO personas_fts(personas_fts, rowid, nombre, apellido) VALUES ('delete', old.id, old.nombre, old.apellido);
+        INSERT INTO personas_fts(rowid, nombre, apellido) VALUES (new.id, new.nombre, new.apellido);
+    END""",
+]
+
+
+# Rango de edad y dominio del correo, tal como se agrupan en las tablas de resumen
+SQL_RANGO_EDAD = """CASE
+    WHEN {edad} < 18 THEN '0-17'
+    WHEN {edad} < 30 THEN '18-29'
+    WHEN {edad} < 45 THEN '30-44'
+    WHEN {edad} < 60 THEN '45-59'
+    ELSE '60+'
+END"""
+SQL_DOMINIO = "lower(substr({correo}, instr({correo}, '@') + 1))"
+
+
+def _sumar_resumen(fila, signo):
+    """Sentencias que suman (signo '+') o restan (signo '-') una persona a las tablas de resumen"""
+    rango = SQL_RANGO_EDAD.format(edad=f"{fila}.edad")
+    dominio = SQL_DOMINIO.format(correo=f"{fila}.correo")
+    return f"""
+        UPDATE resumen_personas SET total = total {signo} 1, suma_edad = suma_edad {signo} {fila}.edad WHERE id = 1;
+        INSERT INTO resumen_edades(rango, cantidad) VALUES ({rango}, {signo}1)
+            ON CONFLICT(rango) DO UPDATE SET cantidad = cantidad {signo} 1;
+        INSERT INTO resumen_dominios(dominio, cantidad) VALUES ({dominio}, {signo}1)
+            ON CONFLICT(dominio) DO UPDATE SET cantidad = cantidad {signo} 1;"""
+
+
+# Tablas de resumen para el tablero de estadísticas. Los triggers las actualizan dentro de la
+# misma transacción que modifica personas, así leerlas no depende del tamaño de la tabla.
+SENTENCIAS_RESUMEN = [
+    """CREATE TABLE IF NOT EXISTS resumen_personas (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER NOT NULL,
+        suma_edad INTEGER NOT NULL
+    )""",
+    "CREATE TABLE IF NOT EXISTS resumen_edades (rango TEXT PRIMARY KEY, cantidad INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS resumen_dominios (dominio TEXT PRIMARY KEY, cantidad INTEGER NOT NULL)",
+    f"""CREATE TRIGGER IF NOT EXISTS personas_resumen_insert AFTER INSERT ON personas BEGIN
+        {_sumar_resumen("new", "+")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS personas_resumen_delete AFTER DELETE ON personas BEGIN
+        {_sumar_resumen("old", "-")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS personas_resumen_update AFTER UPDATE OF edad, correo ON personas BEGIN
+        {_sumar_resumen("old", "-")}
+        {_sumar_resumen("new", "+")}
+    END""",
+]
+
+# Carga inicial de los resúmenes a partir de las personas que ya existían
+SENTENCIAS_RESUMEN_INICIAL = [
+    "INSERT INTO resumen_personas(id, total, suma_edad) SELECT 1, count(*), coalesce(sum(edad), 0) FROM personas",
+    f"""INSERT INTO resumen_edades(rango, cantidad)
+        SELECT {SQL_RANGO_EDAD.format(edad="edad")} AS rango, count(*) FROM personas GROUP BY rango""",
+    f"""INSERT INTO resumen_dominios(dominio, cantidad)
+        SELECT {SQL_DOMINIO.format(correo="correo")} AS dominio, count(*) FROM personas GROUP BY dominio""",
+]
+
+
+# Secuencia de cambios de personas. version_personas guarda el último número entregado;
+# el importador toma uno por carga y lo escribe en las filas que inserta o modifica. Los
+# triggers cubren los cambios hechos por otros medios (solo actúan si la fila no trae una
+# versión nueva) y anotan en personas_borradas los ids eliminados, para que la vista pueda
+# pedir únicamente lo que cambió desde la última versión que vio.
+def _asignar_version(fila):
+    return f"""
+        UPDATE version_personas SET version = version + 1 WHERE id = 1;
+        UPDATE personas SET version = (SELECT version FROM version_personas WHERE id = 1) WHERE id = {fila}.id;"""
+
+
+SENTENCIAS_VERSION = [
+    """CREATE TABLE IF NOT EXISTS version_personas (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )""",
+    "INSERT OR IGNORE INTO version_personas(id, version) VALUES (1, 0)",
+    """CREATE TABLE IF NOT EXISTS personas_borradas (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_personas_borradas_version ON personas_borradas (version)",
+    f"""CREATE TRIGGER IF NOT EXISTS personas_version_insert AFTER INSERT ON personas
+    WHEN new.version IS NULL BEGIN
+        {_asignar_version("new")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS personas_version_update
+    AFTER UPDATE OF nombre, apellido, telefono, correo, edad, cedula ON personas
+    WHEN new.version IS old.version BEGIN
+        {_asignar_version("new")}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS personas_version_delete AFTER DELETE ON personas BEGIN
+        UPDATE version_personas SET version = version + 1 WHERE id = 1;
+        INSERT OR REPLACE INTO personas_borradas(id, version)
+            VALUES (old.id, (SELECT version FROM version_personas WHERE id = 1));
+    END""",
+]
+
+
+def _existe_tabla(conexion, nombre):
+    return conexion.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nombre"), {"nombre": nombre}
+    ).first() is not None
+
+
+def _existe_columna(conexion, tabla, columna):
+    return any(fila.name == columna for fila in conexion.execute(text(f"PRAGMA table_info({tabla})")))
+
+
+def crear_esquema(engine):
+    """Crea las tablas, columnas, índices, el índice de texto completo, los resúmenes y la
+    secuencia de cambios que falten"""
+    # create_all solo crea las tablas que falten; las columnas e índices nuevos de tablas
+    # existentes se agregan aparte
+    Base.metadata.create_all(engine)
+    with engine.begin() as conexion:
+        # Las filas anteriores a la columna quedan con versión NULL (previas a todo cambio)
+        if not _existe_columna(conexion, "personas", "version"):
+            conexion.execute(text("ALTER TABLE personas ADD COLUMN version INTEGER"))
+        for indice in Persona.__table__.indexes:
+            indice.create(conexion, checkfirst=True)
+
+        existia_fts = _existe_tabla(conexion, "personas_fts")
+        for sentencia in SENTENCIAS_FTS:
+            conexion.execute(text(sentencia))
+        # Si la tabla de búsqueda es nueva se indexan las personas que ya existían
+        if not existia_fts:
+            conexion.execute(text("INSERT INTO personas_fts(personas_fts) VALUES ('rebuild')"))
+
+        existia_resumen = _existe_tabla(conexion, "resumen_personas")
+        for sentencia in SENTENCIAS_RESUMEN:
+            conexion.execute(text(sentencia))
+        if not existia_resumen:
+            for sentencia in SENTENCIAS_RESUMEN_INICIAL:
+                conexion.execute(text(sentencia))
+
+        for sentencia in SENTENCIAS_VERSION:
+            conexion.execute(text(sentencia))
+
+
+# Ruta de la base de datos: el único lugar donde se configura (se puede cambiar con PERSONAS_DB)
+RUTA_BD = os.environ.get("PERSONAS_DB", "personas.db")
+
+# Ajustes de SQLite que se aplican a cada conexión nueva del pool
+PRAGMAS_SQLITE = {
+    "journal_mode": "WAL",        # Lectores y el escritor no se bloquean entre sí
+    "synchronous": "NORMAL",      # Seguro con WAL y mucho más rápido que FULL
+    "cache_size": -64000,         # 64 MB de caché de páginas (negativo = KiB)
+    "mmap_size": 268435456,       # 256 MB leídos por memoria mapeada
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,         # Esperar hasta 5 s si otra conexión está escribiendo
+}
+
+# Tamaño del pool de conexiones compartido
+TAMANO_POOL = 5
+
+
+def crear_motor(ruta=RUTA_BD):
+    """Crea un engine de SQLite con pool de conexiones, los PRAGMAS_SQLITE aplicados y
+    la duración de cada consulta registrada en metricas.
+
+    El esquema se prepara aquí, una sola vez por engine, para que quien reciba el engine
+    no tenga que volver a revisarlo.
+    """
+    motor = create_engine(f"sqlite:///{ruta}", pool_size=TAMANO_POOL, max_overflow=TAMANO_POOL)
+
+    @event.listens_for(motor, "connect")
+    def aplicar_pragmas(conexion_dbapi, _registro):
+        cursor = conexion_dbapi.cursor()
+        for nombre, valor in PRAGMAS_SQLITE.items():
+            cursor.execute(f"PRAGMA {nombre} = {valor}")
+        cursor.close()
+
+    instrumentar_motor(motor)
+    crear_esquema(motor)
+    return motor
+
+
+# Crear la base de datos en SQLite: un solo engine para toda la aplicación
+engine = crear_motor(RUTA_BD)
+
+
+# Cantidad de personas por página en la vista
+TAMANO_PAGINA = 50
+
+# Columnas que usan las vistas de lista y las exportaciones. Las lecturas de solo consulta
+# seleccionan solo estas columnas con SQLAlchemy Core y devuelven filas tipo tupla
+# (con acceso por atributo: fila.nombre), sin crear objetos Persona ni mapa de identidad.
+COLUMNAS_LISTA = ("id", "nombre", "apellido", "telefono", "correo", "edad", "cedula")
+
+
+def seleccionar_personas():
+    """SELECT de las COLUMNAS_LISTA de la tabla personas, para completar con filtros"""
+    tabla = Persona.__table__
+    return select(*[tabla.c[col] for col in COLUMNAS_LISTA])
+
+
+def leer_filas(consulta, parametros=None, conexion=None):
+    """Ejecuta una consulta de solo lectura y devuelve la lista de filas.
+
+    Sin conexion abre una propia del engine de la aplicación.
+    """
+    if conexion is None:
+        with engine.connect() as conexion:
+            return leer_filas(consulta, parametros, conexion)
+    return conexion.execute(consulta, parametros or {}).all()
+
+
+# Página de personas con paginación por clave (WHERE id > ? ORDER BY id LIMIT ?)
+def obtener_pagina_personas(despues_de_id=0, limite=TAMANO_PAGINA, conexion=None):
+    """Devuelve hasta limite personas con id mayor que despues_de_id.
+
+    Sin conexion usa una propia para poder llamarse desde otro hilo; el costo no depende
+    de en qué página se esté porque recorre el índice de la clave primaria.
+    """
+    tabla = Persona.__table__
+    return leer_filas(
+        seleccionar_personas().where(tabla.c.id > despues_de_id).order_by(tabla.c.id).limit(limite),
+        conexion=conexion,
+    )
+
+
+# Búsqueda exacta por cédula (usa el índice único de la columna)
+def buscar_por_cedula(cedula):
+    return leer_filas(seleccionar_personas().where(Persona.__table__.c.cedula == cedula.strip()))
+
+
+# Búsqueda por prefijo de teléfono o correo
+def buscar_por_prefijo(columna, prefijo, limite=TAMANO_PAGINA):
+    """Personas cuyo valor en columna empieza por prefijo.
+
+    Se expresa como un rango (col >= prefijo AND col < siguiente) en lugar de LIKE para
+    que SQLite pueda recorrer el índice B-tree de la columna.
+    """
+    prefijo = prefijo.strip()
+    campo = Persona.__table__.c[columna]
+    consulta = seleccionar_personas()
+    if prefijo:
+        siguiente = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+        consulta = consulta.where(campo >= prefijo, campo < siguiente)
+    return leer_filas(consulta.order_by(campo).limit(limite))
+
+
+# Búsqueda de texto completo por nombre y apellido
+def buscar_por_nombre(texto, limite=TAMANO_PAGINA):
+    """Personas cuyo nombre o apellido contienen palabras que empiezan por las buscadas.
+
+    Todas las palabras deben aparecer (por ejemplo "ana gom" encuentra "Ana Gómez").
+    """
+    palabras = [palabra.replace('"', '') for palabra in texto.split()]
+    consulta_fts = " ".join(f'"{palabra}"*' for palabra in palabras if palabra)
+    if not consulta_fts:
+        return []
+    columnas = ", ".join(f"personas.{col}" for col in COLUMNAS_LISTA)
+    return leer_filas(
+        text(
+            f"SELECT {columnas} FROM personas_fts JOIN personas ON personas.id = personas_fts.rowid "
+            "WHERE personas_fts MATCH :consulta ORDER BY rank LIMIT :limite"
+        ),
+        {"consulta": consulta_fts, "limite": limite},
+    )
+
+
+# Cantidad de dominios de correo que se muestran en el tablero
+MAX_DOMINIOS_RESUMEN = 10
+
+
+# Estadísticas del tablero leídas de las tablas de resumen
+def obtener_resumen(max_dominios=MAX_DOMINIOS_RESUMEN):
+    """Devuelve total, edad promedio, personas por rango de edad y los dominios más usados.
+
+    Solo lee las tablas de resumen, así que tarda lo mismo con mil o con un millón de personas.
+    """
+    with engine.connect() as conexion:
+        total, suma_edad = conexion.execute(text("SELECT total, suma_edad FROM resumen_personas WHERE id = 1")).one()
+        edades = conexion.execute(
+            text("SELECT rango, cantidad FROM resumen_edades WHERE cantidad > 0 ORDER BY rango")
+        ).all()
+        dominios = conexion.execute(
+            text("SELECT dominio, cantidad FROM resumen_dominios WHERE cantidad > 0 ORDER BY cantidad DESC LIMIT :limite"),
+            {"limite": max_dominios},
+        ).all()
+    return {
+        "total": total,
+        "promedio_edad": suma_edad / total if total else None,
+        "edades": edades,
+        "dominios": dominios,
+    }
+
+
+def siguiente_version(conexion):
+    """Reserva un número de cambio nuevo dentro de la transacción de conexion"""
+    conexion.execute(text("UPDATE version_personas SET version = version + 1 WHERE id = 1"))
+    return obtener_version_personas(conexion)
+
+
+def obtener_version_personas(conexion=None):
+    """Último número de cambio entregado en la tabla personas"""
+    if conexion is None:
+        with engine.connect() as conexion:
+            return obtener_version_personas(conexion)
+    return conexion.execute(text("SELECT version FROM version_personas WHERE id = 1")).scalar_one()
+
+
+# Cambios de personas posteriores a una versión, para refrescar la vista sin recargarla
+def obtener_cambios_personas(desde_version, despues_de_id=0, hasta_id=None, limite=TAMANO_PAGINA + 1):
+    """Devuelve (version_actual, filas insertadas o modificadas, ids borrados) desde desde_version.
+
+    Se limita a los ids mayores que despues_de_id y, si se indica, menores o iguales que
+    hasta_id, es decir, a la página que se está mostrando. Si no hubo cambios solo se lee
+    el contador de versiones. Las filas se devuelven en orden de id, a lo sumo limite.
+    """
+    tabla = Persona.__table__
+    with engine.connect() as conexion:
+        version = obtener_version_personas(conexion)
+        if version == desde_version:
+            return version, [], []
+
+        consulta = seleccionar_personas().where(
+            tabla.c.version > desde_version, tabla.c.version <= version, tabla.c.id > despues_de_id
+        )
+        borrados = "SELECT id FROM personas_borradas WHERE version > :desde AND version <= :hasta AND id > :despues"
+        parametros = {"desde": desde_version, "hasta": version, "despues": despues_de_id}
+        if hasta_id is not None:
+            consulta = consulta.where(tabla.c.id <= hasta_id)
+            borrados += " AND id <= :hasta_id"
+            parametros["hasta_id"] = hasta_id
+        cambiadas = conexion.execute(consulta.order_by(tabla.c.id).limit(limite)).all()
+        ids_borrados = conexion.execute(text(borrados), parametros).scalars().all()
+    return version, cambiadas, ids_borrados
+
+
+# Versiones asíncronas de las lecturas, para los manejadores async de Flet.
+# SQLite no tiene un driver asíncrono en las dependencias del proyecto, así que cada
+# consulta corre con asyncio.to_thread en un hilo aparte que toma su propia conexión
+# del pool: el bucle de eventos sigue atendiendo la interfaz mientras tanto y varias
+# vistas pueden tener consultas en curso a la vez (hasta el tamaño del pool).
+async def obtener_pagina_personas_async(despues_de_id=0, limite=TAMANO_PAGINA):
+    return await asyncio.to_thread(obtener_pagina_personas, despues_de_id, limite)
+
+
+async def buscar_por_cedula_async(cedula):
+    return await asyncio.to_thread(buscar_por_cedula, cedula)
+
+
+async def buscar_por_prefijo_async(columna, prefijo, limite=TAMANO_PAGINA):
+    return await asyncio.to_thread(buscar_por_prefijo, columna, prefijo, limite)
+
+
+async def buscar_por_nombre_async(texto, limite=TAMANO_PAGINA):
+    return await asyncio.to_thread(buscar_por_nombre, texto, limite)
+
+
+async def obtener_resumen_async(max_dominios=MAX_DOMINIOS_RESUMEN):
+    return await asyncio.to_thread(obtener_resumen, max_dominios)
+
+
+async def obtener_version_personas_async():
+    return await asyncio.to_thread(obtener_version_personas)
+
+
+async def obtener_cambios_personas_async(desde_version, despues_de_id=0, hasta_id=None, limite=TAMANO_PAGINA + 1):
+    return await asyncio.to_thread(obtener_cambios_personas, desde_version, despues_de_id, hasta_id, limite)
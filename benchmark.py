@@ -0,0 +1,197 @@
+"""Benchmarks de importación, consulta y combinación con datos sintéticos.
+
+Genera archivos de personas y archivos para combinar del tamaño indicado, mide por
+separado cada etapa (lectura, validación, inserción, consulta y armado de una página
+de la vista, y combinación) y agrega los resultados como una línea JSON en el archivo
+de salida, para poder comparar corridas en el tiempo.
+
+tracemalloc hace mucho más lento el código que mide, así que cada tamaño se corre dos
+veces: una sin tracemalloc para los tiempos y otra, con datos y base de datos nuevos,
+para el pico de memoria de cada etapa.
+
+Ejemplos:
+    python benchmark.py --filas 1000 10000 100000
+    python benchmark.py --filas 1000000 --formato parquet --salida resultados.jsonl
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from basedatos import TAMANO_PAGINA, crear_motor, obtener_pagina_personas, siguiente_version
+from combinador import combinar_archivos_excel
+from importador import TAMANO_LOTE, dividir_en_lotes, insertar_personas_en_lotes, leer_archivo_por_lotes, validar_lote
+
+# Archivo donde se acumulan los resultados de cada corrida
+ARCHIVO_RESULTADOS = "resultados_benchmark.jsonl"
+
+NOMBRES = ["Ana", "Luis", "María", "Carlos", "Sofía", "Jorge", "Lucía", "Pedro", "Valentina", "Andrés"]
+APELLIDOS = ["Pérez", "Gómez", "Rodríguez", "López", "Martínez", "García", "Torres", "Ramírez", "Díaz", "Vargas"]
+DOMINIOS = ["gmail.com", "hotmail.com", "outlook.com", "yahoo.com", "empresa.com.co"]
+
+
+def generar_personas(n, semilla=0):
+    """DataFrame con n personas sintéticas y cédulas únicas"""
+    rng = np.random.default_rng(semilla)
+    nombres = rng.choice(NOMBRES, n)
+    cedulas = rng.permutation(n) + 10_000_000
+    return pd.DataFrame({
+        "nombre": nombres,
+        "apellido": rng.choice(APELLIDOS, n),
+        "telefono": (3_000_000_000 + rng.integers(0, 999_999_999, n)).astype(str),
+        "correo": [f"{nombre.lower()}{cedula}@{dominio}" for nombre, cedula, dominio
+                   in zip(nombres, cedulas, rng.choice(DOMINIOS, n))],
+        "edad": rng.integers(18, 90, n),
+        "cedula": cedulas.astype(str),
+    })
+
+
+def guardar(df, ruta):
+    """Guarda el DataFrame en el formato que indique la extensión de ruta"""
+    extension = os.path.splitext(ruta)[1]
+    if extension == ".csv":
+        df.to_csv(ruta, index=False)
+    elif extension == ".parquet":
+        df.to_parquet(ruta, index=False)
+    else:
+        df.to_excel(ruta, index=False, engine="openpyxl")
+    return ruta
+
+
+def generar_archivo_personas(carpeta, n, formato="xlsx"):
+    return guardar(generar_personas(n), os.path.join(carpeta, f"personas_{n}.{formato}"))
+
+
+def generar_archivos_combinar(carpeta, n, cantidad):
+    """Crea cantidad archivos Excel de n filas con columnas repetidas entre ellos"""
+    rutas = []
+    for i in range(cantidad):
+        df = generar_personas(n, semilla=i)[["nombre", "correo", "edad"]]
+        rutas.append(guardar(df, os.path.join(carpeta, f"combinar_{n}_{i}.xlsx")))
+    return rutas
+
+
+def medir(resultados, etapa, funcion, filas=None, memoria=False):
+    """Ejecuta funcion y agrega la medición a resultados.
+
+    Sin memoria se mide solo el tiempo; con memoria=True solo el pico de memoria con
+    tracemalloc, cuyo costo arruinaría el tiempo.
+    """
+    if memoria:
+        tracemalloc.start()
+        try:
+            valor = funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        resultados.append({"etapa": etapa, "memoria_pico_mb": round(pico / 1024 / 1024, 2)})
+        print(f"  {etapa:<12} {pico / 1024 / 1024:9.1f} MB")
+        return valor
+
+    inicio = time.perf_counter()
+    valor = funcion()
+    segundos = time.perf_counter() - inicio
+    resultados.append({
+        "etapa": etapa,
+        "filas": filas,
+        "segundos": round(segundos, 4),
+        "filas_por_segundo": round(filas / segundos) if filas and segundos > 0 else None,
+    })
+    print(f"  {etapa:<12} {segundos:9.3f} s")
+    return valor
+
+
+def cargar_tabla_personas():
+    """Tabla de la vista de personas; None si flet no está instalado"""
+    try:
+        from DB import TablaPersonas
+    except ImportError:
+        return None
+    return TablaPersonas
+
+
+def ejecutar(n, formato, archivos_combinar, carpeta, memoria=False):
+    """Corre todas las etapas para n filas y devuelve la lista de mediciones.
+
+    Con memoria=True se mide el pico de memoria de cada etapa en lugar del tiempo.
+    """
+    resultados = []
+    print(f"{n:,} filas ({formato}) - {'memoria' if memoria else 'tiempo'}")
+    os.makedirs(carpeta, exist_ok=True)
+
+    def medir_etapa(etapa, funcion, filas=None):
+        return medir(resultados, etapa, funcion, filas, memoria)
+
+    ruta = generar_archivo_personas(carpeta, n, formato)
+    df = medir_etapa("lectura", lambda: pd.concat(list(leer_archivo_por_lotes(ruta)[0]), ignore_index=True), n)
+    validas, _ = medir_etapa("validacion", lambda: validar_lote(df, set()), n)
+
+    engine = crear_motor(os.path.join(carpeta, f"benchmark_{n}.db"))
+    with engine.begin() as conexion:
+        version = siguiente_version(conexion)
+        medir_etapa("insercion",
+                    lambda: insertar_personas_en_lotes(conexion, dividir_en_lotes(validas, TAMANO_LOTE), version), n)
+    # La vista lee y muestra una página a la vez; se mide una página de la mitad de la tabla
+    with engine.connect() as conexion:
+        personas = medir_etapa("consulta",
+                               lambda: obtener_pagina_personas(n // 2, TAMANO_PAGINA, conexion), TAMANO_PAGINA)
+    TablaPersonas = cargar_tabla_personas()
+    if TablaPersonas is not None:
+        medir_etapa("vista", lambda: TablaPersonas().sincronizar(personas), len(personas))
+    else:
+        print("  (vista omitida: flet no está instalado)")
+    engine.dispose()
+
+    if archivos_combinar:
+        rutas = generar_archivos_combinar(carpeta, n, archivos_combinar)
+        salida = os.path.join(carpeta, f"combinado_{n}.xlsx")
+        medir_etapa("combinacion", lambda: combinar_archivos_excel(rutas, salida), n * archivos_combinar)
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de importación, consulta y combinación.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Tamaños a medir (por defecto %(default)s)")
+    parser.add_argument("--formato", choices=["xlsx", "csv", "parquet"], default="xlsx",
+                        help="Formato del archivo de personas generado")
+    parser.add_argument("--archivos-combinar", type=int, default=3,
+                        help="Archivos a combinar por tamaño (0 para omitir la combinación)")
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="Omitir la segunda corrida que mide el pico de memoria")
+    parser.add_argument("--salida", default=ARCHIVO_RESULTADOS, help="Archivo JSON Lines de resultados")
+    args = parser.parse_args(argv)
+
+    corrida = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "formato": args.formato,
+        "mediciones": {},
+    }
+    with tempfile.TemporaryDirectory() as carpeta:
+        for n in args.filas:
+            tiempos = ejecutar(n, args.formato, args.archivos_combinar, os.path.join(carpeta, f"tiempo_{n}"))
+            picos = {}
+            if not args.sin_memoria:
+                memoria = ejecutar(n, args.formato, args.archivos_combinar, os.path.join(carpeta, f"memoria_{n}"), True)
+                picos = {medicion["etapa"]: medicion["memoria_pico_mb"] for medicion in memoria}
+            corrida["mediciones"][str(n)] = [
+                {**medicion, "memoria_pico_mb": picos.get(medicion["etapa"])} for medicion in tiempos
+            ]
+
+    with open(args.salida, "a", encoding="utf-8") as archivo:
+        archivo.write(json.dumps(corrida, ensure_ascii=False) + "\n")
+    print(f"Resultados agregados a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
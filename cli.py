@@ -0,0 +1,142 @@
+"""Punto de entrada por línea de comandos para importar y combinar archivos sin abrir la interfaz.
+
+Ejemplos:
+    python cli.py import clientes.xlsx --lote 10000 --streaming --upsert
+    python cli.py import regionales/*.xlsx --procesos 4
+    python cli.py combine enero.xlsx febrero.xlsx -o combinado.xlsx --streaming
+    python cli.py combine regionales/*.xlsx -o combinado.xlsx --paralelo --procesos 8
+    python cli.py combine clientes.xlsx pagos.xlsx -o cruce.xlsx --clave cedula --union left
+    python cli.py combine enero.xlsx febrero.xlsx marzo.xlsx -o trimestre.xlsx --apilar
+    python cli.py combine ventas_2024.xlsx -o ventas.xlsx --apilar --todas-las-hojas
+    python cli.py combine sucursal_a.xlsx sucursal_b.xlsx -o resumen.xlsx --hojas Resumen
+    python cli.py export personas.parquet
+"""
+import argparse
+import sys
+import time
+
+import basedatos
+from combinador import TIPOS_UNION, ErrorLecturaArchivo, combinar_archivos_excel, describir_combinacion, listar_hojas
+from exportador import TAMANO_LOTE_EXPORTACION, exportar_personas
+from importador import (
+    TAMANO_LOTE, ArchivoInvalido, describir_resultado, importar_archivo, importar_archivos,
+)
+
+# Códigos de salida
+EXITO = 0
+ERROR = 1
+
+
+def comando_importar(args):
+    """Importa uno o varios archivos de personas a la base de datos"""
+    engine = basedatos.engine if args.bd == basedatos.RUTA_BD else basedatos.crear_motor(args.bd)
+    if len(args.archivos) > 1:
+        inicio = time.perf_counter()
+        resultados = importar_archivos(
+            args.archivos, engine, args.lote, args.streaming, args.upsert,
+            al_terminar_archivo=lambda ruta, resultado, *_: print(describir_resultado(ruta, resultado)),
+            forzar=args.forzar, procesos=args.procesos,
+        )
+        filas = sum(resultado.get("filas", 0) for resultado in resultados.values())
+        fallidos = sum("error" in resultado for resultado in resultados.values())
+        print(f"{len(resultados)} archivos, {filas} filas en {time.perf_counter() - inicio:.2f} s; {fallidos} con error.")
+        return ERROR if fallidos else EXITO
+
+    try:
+        resultado = importar_archivo(
+            args.archivos[0], engine, args.lote, args.streaming, args.upsert, forzar=args.forzar
+        )
+    except ArchivoInvalido as e:
+        print(str(e), file=sys.stderr)
+        return ERROR
+    print(describir_resultado(args.archivos[0], resultado))
+    return EXITO
+
+
+def comando_combinar(args):
+    """Combina varios archivos Excel en uno solo"""
+    try:
+        if args.todas_las_hojas:
+            hojas = {archivo: listar_hojas(archivo) for archivo in args.archivos}
+        else:
+            hojas = {archivo: args.hojas for archivo in args.archivos} if args.hojas else None
+        resultado = combinar_archivos_excel(
+            args.archivos, args.salida, streaming=args.streaming, paralelo=args.paralelo, procesos=args.procesos,
+            clave=args.clave, tipo_union=args.union, apilar=args.apilar, hojas=hojas,
+        )
+    except ErrorLecturaArchivo as e:
+        print(str(e), file=sys.stderr)
+        return ERROR
+    print(describir_combinacion(args.salida, resultado))
+    return EXITO
+
+
+def comando_exportar(args):
+    """Exporta la tabla personas a Excel, CSV o Parquet"""
+    resultado = exportar_personas(args.salida, args.lote)
+    print(f"{resultado['filas']} filas exportadas a '{args.salida}' en {resultado['segundos']:.2f} s.")
+    return EXITO
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Importación y combinación de archivos de DigiWork Solutions.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    importar = subparsers.add_parser("import", help="Cargar archivos Excel, CSV o Parquet en la tabla personas")
+    importar.add_argument("archivos", nargs="+", help="Archivos a importar (varios se leen en paralelo)")
+    importar.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por lote (por defecto %(default)s)")
+    importar.add_argument("--streaming", action="store_true",
+                          help="Leer el Excel en streaming (memoria constante); con varios archivos cada "
+                               "uno se carga completo")
+    importar.add_argument("--upsert", action="store_true", help="Actualizar las personas existentes por cédula")
+    importar.add_argument("--forzar", action="store_true", help="Importar aunque el mismo archivo ya se haya cargado")
+    importar.add_argument("--procesos", type=int, default=None,
+                          help="Procesos para leer varios archivos (por defecto uno por núcleo)")
+    importar.add_argument("--bd", default=basedatos.RUTA_BD,
+                          help="Archivo SQLite de destino (por defecto %(default)s, o la variable PERSONAS_DB)")
+    importar.set_defaults(funcion=comando_importar)
+
+    combinar = subparsers.add_parser("combine", help="Unir varios archivos Excel en uno solo")
+    combinar.add_argument("archivos", nargs="+", help="Archivos Excel a combinar")
+    combinar.add_argument("-o", "--salida", default="archivo_combinado.xlsx", help="Archivo de salida")
+    combinar.add_argument("--streaming", action="store_true",
+                          help="Combinar fila a fila sin cargar los archivos en memoria")
+    combinar.add_argument("--paralelo", action="store_true", help="Leer los archivos a la vez en varios procesos")
+    combinar.add_argument("--procesos", type=int, default=None,
+                          help="Procesos para --paralelo (por defecto uno por núcleo)")
+    combinar.add_argument("--clave", default=None,
+                          help="Columna por la que se unen las filas (sin ella se unen por posición)")
+    combinar.add_argument("--union", choices=TIPOS_UNION, default="inner",
+                          help="Tipo de unión por --clave (por defecto %(default)s)")
+    combinar.add_argument("--apilar", action="store_true",
+                          help="Poner las filas de los archivos una debajo de otra, alineando columnas por nombre")
+    seleccion_hojas = combinar.add_mutually_exclusive_group()
+    seleccion_hojas.add_argument("--hojas", nargs="+", metavar="HOJA",
+                                 help="Hojas que se combinan de cada archivo (por defecto la primera)")
+    seleccion_hojas.add_argument("--todas-las-hojas", action="store_true",
+                                 help="Combinar todas las hojas de cada archivo")
+    combinar.set_defaults(funcion=comando_combinar)
+
+    exportar = subparsers.add_parser("export", help="Exportar la tabla personas a .xlsx, .csv o .parquet")
+    exportar.add_argument("salida", help="Archivo de salida; el formato sale de la extensión")
+    exportar.add_argument("--lote", type=int, default=TAMANO_LOTE_EXPORTACION,
+                          help="Filas que se leen y escriben por vez (por defecto %(default)s)")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if getattr(args, "lote", 1) < 1:
+        print("El tamaño de lote debe ser un número entero mayor que 0.", file=sys.stderr)
+        return ERROR
+    try:
+        return args.funcion(args)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
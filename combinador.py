@@ -0,0 +1,516 @@
+"""Combinación de varios archivos Excel en uno solo, sin depender de la interfaz gráfica"""
+import concurrent.futures
+import contextlib
+import io
+import os
+import pickle
+import time
+import unicodedata
+
+import openpyxl
+import pandas as pd
+
+from metricas import medir, registrar
+
+
+# Tipos de unión por columna clave: solo claves presentes en todos los archivos, todas las
+# del primer archivo, o todas las de cualquier archivo
+TIPOS_UNION = ("inner", "left", "outer")
+
+
+class ErrorLecturaArchivo(Exception):
+    """No se pudo leer uno de los archivos a combinar"""
+
+
+def renombrar_columnas_repetidas(encabezados):
+    """Une las listas de encabezados de cada archivo en una sola, como lo hace la combinación.
+
+    Las columnas de un archivo que ya aparecieron antes se renombran a 'columna_dfN', donde
+    N es la posición (desde 1) del archivo.
+    """
+    final = list(encabezados[0])
+    for i, encabezado in enumerate(encabezados[1:], start=1):
+        repetidas = set(final) & set(encabezado)
+        final += [f"{col}_df{i + 1}" if col in repetidas else col for col in encabezado]
+    return final
+
+
+def _encabezado_excel(fila):
+    # Mismo nombre que pone pandas a los encabezados vacíos
+    return [f"Unnamed: {j}" if valor is None else str(valor) for j, valor in enumerate(fila or ())]
+
+
+def _filas_de_datos(filas, ancho):
+    """Completa cada fila al ancho del encabezado y descarta las filas vacías del final.
+
+    Las filas vacías se retienen hasta ver si después viene una con datos, igual que pandas
+    las descarta solo al final de la hoja.
+    """
+    vacias = []
+    for fila in filas:
+        fila = tuple(fila[:ancho]) + (None,) * (ancho - len(fila))
+        if all(valor is None for valor in fila):
+            vacias.append(fila)
+            continue
+        yield from vacias
+        vacias.clear()
+        yield fila
+
+
+def normalizar_nombre_columna(nombre):
+    """Nombre de columna sin tildes, en minúsculas y con los espacios simplificados"""
+    texto = unicodedata.normalize("NFKD", str(nombre))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.lower().split())
+
+
+def _nombres_normalizados(columnas):
+    """Normaliza los nombres de un archivo; si dos quedan iguales, al segundo se le agrega _2"""
+    nombres = []
+    for columna in columnas:
+        nombre = base = normalizar_nombre_columna(columna)
+        repeticion = 1
+        while nombre in nombres:
+            repeticion += 1
+            nombre = f"{base}_{repeticion}"
+        nombres.append(nombre)
+    return nombres
+
+
+def _columnas_union(encabezados):
+    """Todas las columnas de los encabezados, en el orden en que aparecen por primera vez"""
+    return list(dict.fromkeys(col for encabezado in encabezados for col in encabezado))
+
+
+def listar_hojas(archivo):
+    """Nombres de las hojas del libro, en orden, sin cargar sus celdas"""
+    try:
+        libro = openpyxl.load_workbook(archivo, read_only=True)
+    except Exception as e:
+        raise ErrorLecturaArchivo(f"Error al leer el archivo {archivo}: {str(e)}") from e
+    try:
+        return libro.sheetnames
+    finally:
+        libro.close()
+
+
+def _hojas_elegidas(hojas, archivo):
+    """Hojas elegidas para el archivo en el diccionario hojas; None significa solo la primera"""
+    return (hojas or {}).get(archivo) or None
+
+
+def _nombre_entrada(archivo, hoja):
+    # Cada hoja elegida es una entrada de la combinación; así se la nombra en los resultados
+    return archivo if hoja is None else f"{archivo} [{hoja}]"
+
+
+def _abrir_entradas(pila, archivos, hojas):
+    """Abre cada libro una sola vez en modo read-only y prepara sus hojas elegidas.
+
+    Devuelve una lista de (nombre de entrada, encabezado, generador de filas de datos); los
+    libros se cierran al salir de pila.
+    """
+    entradas = []
+    for archivo in archivos:
+        try:
+            libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+            pila.callback(libro.close)
+            elegidas = _hojas_elegidas(hojas, archivo)
+            for nombre_hoja in elegidas or [None]:
+                hoja = libro.active if nombre_hoja is None else libro[nombre_hoja]
+                filas = hoja.iter_rows(values_only=True)
+                encabezado = _encabezado_excel(next(filas, None))
+                entradas.append(
+                    (_nombre_entrada(archivo, nombre_hoja), encabezado, _filas_de_datos(filas, len(encabezado)))
+                )
+        except Exception as e:
+            raise ErrorLecturaArchivo(f"Error al leer el archivo {archivo}: {str(e)}") from e
+    return entradas
+
+
+def _apilar_entradas_streaming(entradas, archivo_salida):
+    """Apila las filas de todas las entradas, una tras otra, en un libro write-only.
+
+    Con los encabezados ya leídos arma la lista de columnas; después copia las filas de
+    cada entrada ubicando cada valor en su columna y dejando vacías las que la entrada no
+    tiene. Las celdas de Excel guardan su propio tipo, así que no hace falta convertir
+    tipos. Devuelve (filas, columnas, {entrada: columnas faltantes}).
+    """
+    nombres = [_nombres_normalizados(encabezado) for _, encabezado, _ in entradas]
+    columnas = _columnas_union(nombres)
+    faltantes = {
+        entrada: [col for col in columnas if col not in nombres_entrada]
+        for (entrada, _, _), nombres_entrada in zip(entradas, nombres)
+    }
+
+    salida = openpyxl.Workbook(write_only=True)
+    hoja = salida.create_sheet()
+    hoja.append(columnas)
+    num_filas = 0
+    for (_, _, filas), nombres_entrada in zip(entradas, nombres):
+        posicion = {nombre: j for j, nombre in enumerate(nombres_entrada)}
+        posiciones = [posicion.get(col) for col in columnas]
+        for fila in filas:
+            hoja.append([None if j is None else fila[j] for j in posiciones])
+            num_filas += 1
+    salida.save(archivo_salida)
+    return num_filas, len(columnas), faltantes
+
+
+def combinar_archivos_excel_streaming(archivos, archivo_salida, apilar=False, hojas=None):
+    """Combina por posición de fila igual que combinar_archivos_excel, pero sin DataFrames.
+
+    Recorre las hojas de todos los archivos a la vez con lectores read-only de openpyxl y
+    escribe cada fila unida directamente en un libro write-only, así la memoria no depende
+    del tamaño de los archivos. Se detiene al terminar la hoja más corta. Con apilar=True
+    las filas se ponen una debajo de otra (ver _apilar_entradas_streaming). hojas indica,
+    por archivo, qué hojas usar (por defecto la primera); cada libro se abre una sola vez.
+    """
+    inicio = time.perf_counter()
+    with contextlib.ExitStack() as pila:
+        entradas = _abrir_entradas(pila, archivos, hojas)
+        if apilar:
+            with medir("apilado_streaming", detalle=archivo_salida) as medicion:
+                num_filas, num_columnas, faltantes = _apilar_entradas_streaming(entradas, archivo_salida)
+                medicion["filas"] = num_filas
+            return {
+                "filas": num_filas, "columnas": num_columnas, "segundos": time.perf_counter() - inicio,
+                "columnas_faltantes": faltantes,
+            }
+
+        columnas = renombrar_columnas_repetidas([encabezado for _, encabezado, _ in entradas])
+        salida = openpyxl.Workbook(write_only=True)
+        hoja = salida.create_sheet()
+        hoja.append(columnas)
+        num_filas = 0
+        with medir("combinacion_streaming", detalle=archivo_salida) as medicion:
+            # zip avanza todos los lectores juntos y termina con el más corto
+            for partes in zip(*[filas for _, _, filas in entradas]):
+                hoja.append([valor for parte in partes for valor in parte])
+                num_filas += 1
+            salida.save(archivo_salida)
+            medicion["filas"] = num_filas
+
+    return {"filas": num_filas, "columnas": len(columnas), "segundos": time.perf_counter() - inicio}
+
+
+def _serializar_df(df):
+    """Empaqueta el DataFrame para devolverlo desde otro proceso.
+
+    Se usa el formato de streaming de Arrow, que se copia en bloque y se reconstruye mucho
+    más rápido que un DataFrame serializado con pickle. Se usa pickle si pyarrow no está
+    instalado, si la tabla tiene columnas que Arrow no admite (tipos mezclados) o si algún
+    encabezado no es texto, porque Arrow lo devolvería como texto (2024 pasaría a '2024')
+    y el resultado ya no sería igual al de la lectura en este proceso.
+    """
+    if not all(isinstance(columna, str) for columna in df.columns):
+        return "pickle", pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        import pyarrow as pa
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+    except (ImportError, ValueError, TypeError, NotImplementedError):
+        # Los errores de conversión de Arrow (ArrowInvalid, ArrowTypeError) heredan de estos
+        return "pickle", pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return "arrow", buffer.getvalue()
+
+
+def _deserializar_df(formato, datos):
+    if formato == "pickle":
+        return pickle.loads(datos)
+    import pyarrow as pa
+    return pa.ipc.open_stream(datos).read_all().to_pandas()
+
+
+def leer_hojas_excel(archivo, elegidas=None):
+    """Lee las hojas elegidas del archivo (por defecto la primera) abriéndolo una sola vez.
+
+    Devuelve una lista de (nombre de hoja o None, DataFrame) en el orden de elegidas.
+    """
+    try:
+        if elegidas is None:
+            return [(None, pd.read_excel(archivo, engine="openpyxl"))]
+        # Con una lista de hojas pandas abre el libro una vez y devuelve un diccionario
+        por_hoja = pd.read_excel(archivo, sheet_name=list(elegidas), engine="openpyxl")
+    except Exception as e:
+        raise ErrorLecturaArchivo(f"Error al leer el archivo {archivo}: {str(e)}") from e
+    return [(hoja, por_hoja[hoja]) for hoja in elegidas]
+
+
+def leer_excel_serializado(archivo, elegidas=None):
+    """Lee el archivo en un proceso del pool.
+
+    Devuelve ([(hoja, formato, datos), ...], filas, segundos).
+    """
+    inicio = time.perf_counter()
+    leidas = leer_hojas_excel(archivo, elegidas)
+    serializadas = [(hoja, *_serializar_df(df)) for hoja, df in leidas]
+    return serializadas, sum(len(df) for _, df in leidas), time.perf_counter() - inicio
+
+
+def _leer_archivos(archivos, hojas=None):
+    """Lee los archivos uno tras otro.
+
+    Devuelve (lista de (nombre de entrada, DataFrame) por cada hoja, segundos por archivo).
+    """
+    entradas = []
+    segundos = {}
+    for archivo in archivos:
+        inicio = time.perf_counter()
+        with medir("read_excel", detalle=archivo) as medicion:
+            leidas = leer_hojas_excel(archivo, _hojas_elegidas(hojas, archivo))
+            medicion["filas"] = sum(len(df) for _, df in leidas)
+        entradas += [(_nombre_entrada(archivo, hoja), df) for hoja, df in leidas]
+        segundos[archivo] = time.perf_counter() - inicio
+    return entradas, segundos
+
+
+def _leer_archivos_en_paralelo(archivos, hojas=None, procesos=None):
+    """Lee los archivos con un pool de procesos, un archivo (con todas sus hojas) por tarea.
+
+    Devuelve lo mismo que _leer_archivos, en el orden de archivos, con los segundos de
+    lectura medidos en el proceso que leyó cada archivo.
+    """
+    max_procesos = min(len(archivos), procesos or os.cpu_count() or 1)
+    por_archivo = {}
+    segundos = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_procesos) as pool:
+        futuros = {
+            pool.submit(leer_excel_serializado, archivo, _hojas_elegidas(hojas, archivo)): archivo
+            for archivo in archivos
+        }
+        for futuro in concurrent.futures.as_completed(futuros):
+            archivo = futuros[futuro]
+            serializadas, filas, segundos[archivo] = futuro.result()
+            por_archivo[archivo] = [
+                (_nombre_entrada(archivo, hoja), _deserializar_df(formato, datos))
+                for hoja, formato, datos in serializadas
+            ]
+            # Las mediciones hechas en otro proceso no llegan a este; se registran aquí
+            registrar("read_excel", segundos[archivo], filas, archivo)
+    entradas = [entrada for archivo in archivos for entrada in por_archivo[archivo]]
+    return entradas, {archivo: segundos[archivo] for archivo in archivos}
+
+
+def _combinar_por_posicion(dfs):
+    # Determinar el número mínimo de filas entre todos los DataFrames
+    num_filas = min(len(df) for df in dfs)
+
+    # Truncar todos los DataFrames para que tengan el mismo número de filas
+    dfs = [df.head(num_filas) for df in dfs]
+
+    # Combinar los DataFrames basados en el índice (orden de las filas)
+    df_final = dfs[0]
+    for i, df in enumerate(dfs[1:], start=1):
+        # Renombrar columnas duplicadas para evitar conflictos
+        columnas_duplicadas = set(df_final.columns) & set(df.columns)
+        df = df.rename(columns={col: f"{col}_df{i + 1}" for col in columnas_duplicadas})
+        # Combinar los DataFrames
+        df_final = df_final.join(df)
+    return df_final
+
+
+def _columna_a_texto(serie):
+    """Pasa la columna a texto; los decimales sin parte fraccionaria quedan como enteros"""
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype("Int64")
+    return serie.astype("string")
+
+
+def _normalizar_clave(serie):
+    """Pasa la columna clave a texto sin espacios, para que 123, 123.0 y ' 123' coincidan"""
+    return _columna_a_texto(serie).str.strip().replace("", pd.NA)
+
+
+def _combinar_por_clave(dfs, archivos, clave, tipo_union):
+    """Une los DataFrames por el valor de la columna clave.
+
+    Cada archivo se indexa por su clave (un índice hash de pandas) y se alinea de una sola
+    vez con la lista final de claves; después se concatenan todas las columnas en un solo
+    paso, sin volver a unir un resultado que crece. Si una clave se repite en un archivo se
+    usa su primera fila y las demás se descartan. Devuelve (DataFrame combinado,
+    {archivo: claves sin coincidencia}, {archivo: filas descartadas por clave repetida}),
+    donde las claves sin coincidencia de un archivo son las que faltan en algún otro.
+    """
+    if tipo_union not in TIPOS_UNION:
+        raise ValueError(f"Tipo de unión no válido: '{tipo_union}'. Usa {', '.join(TIPOS_UNION)}.")
+    for archivo, df in zip(archivos, dfs):
+        if clave not in df.columns:
+            raise ValueError(f"El archivo {archivo} no tiene la columna clave '{clave}'.")
+
+    indexados = []
+    duplicadas = {}
+    for archivo, df in zip(archivos, dfs):
+        df = df.assign(**{clave: _normalizar_clave(df[clave])}).dropna(subset=[clave])
+        repetidas = df[clave].duplicated(keep="first")
+        duplicadas[archivo] = int(repetidas.sum())
+        indexados.append(df.loc[~repetidas].set_index(clave))
+
+    comunes = indexados[0].index
+    for df in indexados[1:]:
+        comunes = comunes.intersection(df.index)
+    if tipo_union == "inner":
+        claves = comunes
+    elif tipo_union == "left":
+        claves = indexados[0].index
+    else:
+        # Todas las claves en el orden en que aparecen por primera vez
+        claves = pd.Index(pd.unique(pd.concat([df.index.to_series() for df in indexados], ignore_index=True)))
+    claves = claves.rename(clave)
+
+    # Las columnas que no son la clave se renombran igual que en la unión por posición
+    encabezados = [[clave, *indexados[0].columns]] + [list(df.columns) for df in indexados[1:]]
+    columnas = renombrar_columnas_repetidas(encabezados)[1:]
+    partes = []
+    inicio_columnas = 0
+    for df in indexados:
+        df = df.reindex(claves)
+        df.columns = columnas[inicio_columnas:inicio_columnas + len(df.columns)]
+        inicio_columnas += len(df.columns)
+        partes.append(df)
+    df_final = pd.concat(partes, axis=1).reset_index()
+
+    sin_coincidencia = {archivo: len(df.index) - len(comunes) for archivo, df in zip(archivos, indexados)}
+    return df_final, sin_coincidencia, duplicadas
+
+
+def _tipo_comun(series):
+    """Tipo al que se llevan las partes de una columna antes de apilarlas.
+
+    Enteros quedan como Int64 (admite vacíos sin pasar a decimal), números mezclados como
+    float64; si todas las partes ya comparten un tipo se deja igual (None) y si mezclan
+    números, fechas o texto se pasa todo a texto ('texto').
+    """
+    tipos = [serie.dtype for serie in series]
+    if all(pd.api.types.is_bool_dtype(tipo) for tipo in tipos):
+        return "boolean"
+    if all(pd.api.types.is_integer_dtype(tipo) for tipo in tipos):
+        return "Int64"
+    if all(pd.api.types.is_numeric_dtype(tipo) and not pd.api.types.is_bool_dtype(tipo) for tipo in tipos):
+        return "float64"
+    if all(pd.api.types.is_datetime64_any_dtype(tipo) for tipo in tipos):
+        return None
+    if all(pd.api.types.is_string_dtype(tipo) or pd.api.types.is_object_dtype(tipo) for tipo in tipos):
+        return None
+    return "texto"
+
+
+def _apilar(dfs, archivos):
+    """Pone las filas de todos los DataFrames una debajo de otra en una sola concatenación.
+
+    Las columnas se alinean por nombre normalizado, las que le faltan a un archivo quedan
+    vacías y cada columna se lleva a un tipo común (ver _tipo_comun) antes de concatenar.
+    Devuelve (DataFrame apilado, {archivo: columnas faltantes}).
+    """
+    dfs = [df.set_axis(_nombres_normalizados(df.columns), axis=1) for df in dfs]
+    columnas = _columnas_union([df.columns for df in dfs])
+    faltantes = {archivo: [col for col in columnas if col not in df.columns] for archivo, df in zip(archivos, dfs)}
+
+    partes = [{} for _ in dfs]
+    for col in columnas:
+        presentes = [df[col] for df in dfs if col in df.columns]
+        tipo = _tipo_comun(presentes)
+        # Tipo de la columna vacía que se agrega a los archivos que no la tienen
+        tipo_vacia = {"texto": "string", None: presentes[0].dtype}.get(tipo, tipo)
+        for parte, df in zip(partes, dfs):
+            if col not in df.columns:
+                parte[col] = pd.Series(None, index=df.index, dtype=tipo_vacia)
+            elif tipo == "texto":
+                parte[col] = _columna_a_texto(df[col])
+            elif tipo is None:
+                parte[col] = df[col]
+            else:
+                parte[col] = df[col].astype(tipo)
+
+    df_final = pd.concat([pd.DataFrame(parte, index=df.index) for parte, df in zip(partes, dfs)], ignore_index=True)
+    return df_final, faltantes
+
+
+def combinar_archivos_excel(archivos, archivo_salida, streaming=False, paralelo=False, procesos=None,
+                            clave=None, tipo_union="inner", apilar=False, hojas=None):
+    """Une los archivos y guarda el resultado en archivo_salida.
+
+    hojas es un diccionario {archivo: [nombres de hojas]}; cada hoja elegida se combina
+    como si fuera un archivo aparte y cada libro se lee una sola vez. Los archivos que no
+    están en hojas aportan solo su primera hoja.
+
+    Sin clave las filas se unen por posición hasta el largo del archivo más corto; con
+    clave se unen por el valor de esa columna según tipo_union ('inner', 'left' u 'outer').
+    Con apilar=True las filas de los archivos se ponen una debajo de otra, con las columnas
+    alineadas por nombre. Con streaming=True se usa combinar_archivos_excel_streaming
+    (memoria constante; por posición o apilando). Con paralelo=True los archivos se leen a
+    la vez en un pool de hasta procesos procesos (por defecto uno por núcleo). Devuelve un
+    diccionario con filas, columnas, segundos, segundos_por_archivo (tiempo de lectura de
+    cada archivo) y, con clave, claves_sin_coincidencia y claves_duplicadas (filas
+    descartadas por repetir la clave) o, al apilar, columnas_faltantes por entrada
+    ('archivo [hoja]' si se eligieron hojas).
+    """
+    if apilar and clave:
+        raise ValueError("Al apilar filas no se usa columna clave; quítala o elige otro modo.")
+    if streaming:
+        if clave:
+            raise ValueError("La combinación en streaming no une por clave; quita la columna clave.")
+        return combinar_archivos_excel_streaming(archivos, archivo_salida, apilar, hojas)
+    inicio = time.perf_counter()
+
+    # Cargar los archivos Excel
+    if paralelo and len(archivos) > 1:
+        entradas, segundos_por_archivo = _leer_archivos_en_paralelo(archivos, hojas, procesos)
+    else:
+        entradas, segundos_por_archivo = _leer_archivos(archivos, hojas)
+    nombres = [nombre for nombre, _ in entradas]
+    dfs = [df for _, df in entradas]
+
+    resultado = {}
+    if apilar:
+        with medir("apilado", detalle=archivo_salida) as medicion:
+            df_final, resultado["columnas_faltantes"] = _apilar(dfs, nombres)
+            medicion["filas"] = len(df_final)
+    elif clave:
+        with medir("union_por_clave", detalle=f"{tipo_union} por {clave}") as medicion:
+            df_final, resultado["claves_sin_coincidencia"], resultado["claves_duplicadas"] = _combinar_por_clave(
+                dfs, nombres, clave, tipo_union
+            )
+            medicion["filas"] = len(df_final)
+    else:
+        df_final = _combinar_por_posicion(dfs)
+
+    # Guardar en un nuevo archivo Excel
+    with medir("to_excel", filas=len(df_final), detalle=archivo_salida):
+        df_final.to_excel(archivo_salida, index=False, engine="openpyxl")
+
+    return {
+        "filas": len(df_final),
+        "columnas": len(df_final.columns),
+        "segundos": time.perf_counter() - inicio,
+        "segundos_por_archivo": segundos_por_archivo,
+        **resultado,
+    }
+
+
+def describir_combinacion(archivo_salida, resultado):
+    """Arma el mensaje para el usuario con las filas combinadas, los tiempos de lectura y lo
+    que no se pudo unir (claves sin coincidencia o repetidas, columnas faltantes)"""
+    detalles = [
+        f"{os.path.basename(archivo)}: leído en {segundos:.2f} s"
+        for archivo, segundos in resultado.get("segundos_por_archivo", {}).items()
+    ]
+    detalles += [
+        f"{os.path.basename(entrada)}: {cantidad} clave(s) sin coincidencia"
+        for entrada, cantidad in resultado.get("claves_sin_coincidencia", {}).items()
+    ]
+    detalles += [
+        f"{os.path.basename(entrada)}: {cantidad} fila(s) descartadas por clave repetida"
+        for entrada, cantidad in resultado.get("claves_duplicadas", {}).items() if cantidad
+    ]
+    detalles += [
+        f"{os.path.basename(entrada)}: sin las columnas {', '.join(columnas)}"
+        for entrada, columnas in resultado.get("columnas_faltantes", {}).items() if columnas
+    ]
+    return "\n".join([
+        f"Archivo combinado guardado como '{archivo_salida}': {resultado['filas']} filas, "
+        f"{resultado['columnas']} columnas en {resultado['segundos']:.2f} s.",
+        *[f"  {detalle}" for detalle in detalles],
+    ])
@@ -0,0 +1,109 @@
+"""Exportación de la tabla personas a Excel, CSV o Parquet con memoria acotada"""
+import csv
+import os
+import threading
+import time
+
+import openpyxl
+
+from basedatos import COLUMNAS_LISTA, Persona, engine, obtener_resumen, seleccionar_personas
+
+# Filas que se traen de la base de datos y se escriben por vez
+TAMANO_LOTE_EXPORTACION = 10000
+
+EXTENSIONES_EXPORTACION = (".xlsx", ".csv", ".parquet")
+
+
+class ExportacionCancelada(Exception):
+    """Se lanza cuando el usuario cancela una exportación en curso"""
+
+
+def iterar_lotes_personas(tamano_lote=TAMANO_LOTE_EXPORTACION):
+    """Recorre la tabla personas en orden de id con un cursor que trae tamano_lote filas por vez.
+
+    stream_results evita que el resultado completo se cargue en memoria; partitions()
+    entrega las filas en listas de a lo sumo tamano_lote.
+    """
+    consulta = seleccionar_personas().order_by(Persona.__table__.c.id)
+    with engine.connect() as conexion:
+        resultado = conexion.execution_options(stream_results=True, yield_per=tamano_lote).execute(consulta)
+        for lote in resultado.partitions(tamano_lote):
+            yield lote
+
+
+def _escribir_excel(ruta, lotes):
+    # En modo write-only openpyxl escribe cada fila al archivo sin guardar las celdas en memoria
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet("personas")
+    hoja.append(list(COLUMNAS_LISTA))
+    for lote in lotes:
+        for fila in lote:
+            hoja.append(tuple(fila))
+    libro.save(ruta)
+
+
+def _escribir_csv(ruta, lotes):
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(COLUMNAS_LISTA)
+        for lote in lotes:
+            escritor.writerows(lote)
+
+
+def _escribir_parquet(ruta, lotes):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Para exportar a Parquet instala 'pyarrow' (pip install pyarrow).")
+
+    esquema = pa.schema([
+        (col, pa.int64() if col in ("id", "edad") else pa.string()) for col in COLUMNAS_LISTA
+    ])
+    # Cada lote se escribe como un grupo de filas del archivo
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for lote in lotes:
+            columnas = list(zip(*lote))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema,
+            ))
+
+
+ESCRITORES = {".xlsx": _escribir_excel, ".csv": _escribir_csv, ".parquet": _escribir_parquet}
+
+
+def exportar_personas(ruta, tamano_lote=TAMANO_LOTE_EXPORTACION, al_avanzar=None, cancelacion=None):
+    """Exporta toda la tabla personas al formato que indique la extensión de ruta.
+
+    al_avanzar(hechas, total) se llama después de cada lote; si cancelacion se activa se
+    borra el archivo a medio escribir y se lanza ExportacionCancelada. Devuelve un
+    diccionario con filas y segundos.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: '{extension}'. Usa .xlsx, .csv o .parquet.")
+
+    inicio = time.perf_counter()
+    cancelacion = cancelacion or threading.Event()
+    # El total sale de la tabla de resumen, sin recorrer personas
+    total = obtener_resumen()["total"]
+    filas = 0
+
+    def lotes_con_progreso():
+        nonlocal filas
+        for lote in iterar_lotes_personas(tamano_lote):
+            if cancelacion.is_set():
+                raise ExportacionCancelada()
+            yield lote
+            filas += len(lote)
+            if al_avanzar:
+                al_avanzar(filas, total)
+
+    try:
+        ESCRITORES[extension](ruta, lotes_con_progreso())
+    except ExportacionCancelada:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        raise
+    return {"filas": filas, "segundos": time.perf_counter() - inicio}
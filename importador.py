@@ -0,0 +1,588 @@
+"""Lectura, validación e inserción de archivos de personas, sin depender de la interfaz gráfica"""
+import concurrent.futures
+import datetime
+import hashlib
+import itertools
+import os
+import threading
+import time
+
+import openpyxl
+import pandas as pd
+from sqlalchemy import insert, select, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from basedatos import Importacion, Persona, siguiente_version
+from metricas import medir
+
+# Columnas que debe traer el archivo para poder cargarlo en la tabla personas
+COLUMNAS_REQUERIDAS = ["nombre", "apellido", "telefono", "correo", "edad", "cedula"]
+
+# Cantidad de filas que se insertan por cada executemany
+TAMANO_LOTE = 5000
+
+# Máximo de parámetros por consulta IN (límite conservador de SQLite)
+MAX_PARAMETROS_SQLITE = 900
+
+# Bytes que se leen por vez al calcular el hash de un archivo
+TAMANO_BLOQUE_HASH = 1024 * 1024
+
+# Extensiones de archivo que acepta la importación
+EXTENSIONES_EXCEL = (".xlsx", ".xlsm")
+EXTENSIONES_PARQUET = (".parquet", ".pq")
+
+# Formatos aceptados al validar las filas importadas
+PATRON_CORREO = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+PATRON_TELEFONO = r"\+?[0-9][0-9 ()\-]{5,19}"
+EDAD_MAXIMA = 130
+
+
+def normalizar_columnas(df):
+    """Quita espacios y pasa a minúsculas los nombres de las columnas"""
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+    return df
+
+
+def leer_excel_por_lotes(ruta, tamano_lote=TAMANO_LOTE):
+    """Lee el Excel fila a fila en modo read-only y genera DataFrames de tamano_lote filas.
+
+    Solo se mantiene en memoria el lote actual, por lo que el consumo no depende
+    del tamaño del archivo.
+    """
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        columnas = pd.Index(["" if c is None else str(c) for c in encabezado]).str.strip().str.lower()
+
+        lote = []
+        for fila in filas:
+            # Las hojas suelen arrastrar filas vacías al final
+            if all(valor is None for valor in fila):
+                continue
+            lote.append(fila)
+            if len(lote) == tamano_lote:
+                yield pd.DataFrame(lote, columns=columnas)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=columnas)
+    finally:
+        libro.close()
+
+
+def contar_filas_excel(ruta):
+    """Número aproximado de filas de datos según la dimensión de la hoja (None si no la declara)"""
+    libro = openpyxl.load_workbook(ruta, read_only=True)
+    try:
+        max_fila = libro.active.max_row
+    finally:
+        libro.close()
+    return max_fila - 1 if max_fila else None
+
+
+def leer_csv_por_lotes(ruta, tamano_lote=TAMANO_LOTE):
+    """Lee el CSV por bloques de tamano_lote filas con las columnas normalizadas.
+
+    Todo se lee como texto para no perder los ceros a la izquierda de cédulas y
+    teléfonos; la edad se convierte a número al validar. Las celdas vacías quedan nulas.
+    """
+    with pd.read_csv(ruta, chunksize=tamano_lote, dtype=str) as lector:
+        for bloque in lector:
+            yield normalizar_columnas(bloque)
+
+
+def leer_parquet_por_lotes(ruta, tamano_lote=TAMANO_LOTE):
+    """Lee el Parquet grupo de filas a grupo de filas, en lotes de tamano_lote"""
+    import pyarrow.parquet as pq
+
+    archivo = pq.ParquetFile(ruta)
+    for lote in archivo.iter_batches(batch_size=tamano_lote):
+        yield normalizar_columnas(lote.to_pandas())
+
+
+def leer_archivo_por_lotes(ruta, tamano_lote=TAMANO_LOTE, streaming=False):
+    """Elige el lector según la extensión y devuelve (generador de lotes, total de filas o None)"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        return leer_csv_por_lotes(ruta, tamano_lote), None
+    if extension in EXTENSIONES_PARQUET:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Para leer archivos Parquet instala 'pyarrow' (pip install pyarrow).")
+        return leer_parquet_por_lotes(ruta, tamano_lote), pq.ParquetFile(ruta).metadata.num_rows
+    if extension not in EXTENSIONES_EXCEL:
+        raise ValueError(f"Formato no soportado: '{extension}'. Usa Excel, CSV o Parquet.")
+    if streaming:
+        # Leer el archivo por lotes sin cargarlo completo en memoria
+        return leer_excel_por_lotes(ruta, tamano_lote), contar_filas_excel(ruta)
+    # Cargar el archivo Excel completo y normalizar los nombres de las columnas. Se lee como
+    # texto, igual que el CSV, para que '0012' no se convierta en el número 12
+    with medir("read_excel", detalle=ruta) as medicion:
+        df = normalizar_columnas(pd.read_excel(ruta, engine="openpyxl", dtype=str))
+        medicion["filas"] = len(df)
+    return dividir_en_lotes(df, tamano_lote), len(df)
+
+
+def dividir_en_lotes(df, tamano_lote=TAMANO_LOTE):
+    """Genera porciones del DataFrame de a lo sumo tamano_lote filas"""
+    for inicio in range(0, len(df), tamano_lote):
+        yield df.iloc[inicio:inicio + tamano_lote]
+
+
+class ImportacionCancelada(Exception):
+    """Se lanza cuando el usuario cancela una carga en curso"""
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede importar (vacío o sin las columnas requeridas)"""
+
+
+def seguir_progreso(lotes, al_avanzar, cancelacion):
+    """Envuelve los lotes para informar las filas procesadas y permitir cancelar entre lotes"""
+    hechas = 0
+    for lote in lotes:
+        if cancelacion.is_set():
+            raise ImportacionCancelada()
+        yield lote
+        hechas += len(lote)
+        al_avanzar(hechas)
+    if cancelacion.is_set():
+        raise ImportacionCancelada()
+
+
+def _columna_a_texto(serie):
+    """Convierte una columna a texto sin arrastrar el '.0' de los números leídos como float"""
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype("Int64")
+    return serie.astype("string").str.strip()
+
+
+def preparar_lote(lote):
+    """Deja el lote con los tipos de la tabla personas (texto y edad entera) y None en los nulos"""
+    preparado = pd.DataFrame({
+        col: (lote[col].astype("Int64") if col == "edad" else _columna_a_texto(lote[col]))
+        for col in COLUMNAS_REQUERIDAS
+    })
+    return preparado.astype(object).where(preparado.notna(), None)
+
+
+def validar_lote(lote, cedulas_vistas):
+    """Separa las filas válidas de las rechazadas usando operaciones sobre columnas completas.
+
+    cedulas_vistas acumula las cédulas de lotes anteriores para detectar duplicados
+    en todo el archivo; se queda la primera aparición. Devuelve (validas, rechazadas),
+    donde rechazadas trae una columna 'motivo'.
+    """
+    texto = {col: _columna_a_texto(lote[col]) for col in COLUMNAS_REQUERIDAS if col != "edad"}
+    edad = pd.to_numeric(lote["edad"], errors="coerce")
+    cedula = texto["cedula"]
+
+    revisiones = [
+        (f"faltan datos en {col}", valores.isna() | (valores == "")) for col, valores in texto.items()
+    ]
+    revisiones += [
+        ("edad inválida", edad.isna() | (edad % 1 != 0) | (edad < 0) | (edad > EDAD_MAXIMA)),
+        ("correo inválido", texto["correo"].notna() & ~texto["correo"].str.fullmatch(PATRON_CORREO).fillna(False)),
+        ("teléfono inválido", texto["telefono"].notna() & ~texto["telefono"].str.fullmatch(PATRON_TELEFONO).fillna(False)),
+    ]
+
+    motivos = pd.Series("", index=lote.index)
+    for motivo, mascara in revisiones:
+        mascara = mascara.fillna(False).astype(bool)
+        motivos = motivos.where(~mascara, motivos + motivo + "; ")
+
+    # Los duplicados se buscan solo entre las filas que pasaron las demás revisiones, para
+    # que una fila rechazada no impida cargar otra correcta con la misma cédula
+    correctas = cedula[motivos == ""]
+    duplicada = (correctas.duplicated() | correctas.isin(cedulas_vistas)).reindex(lote.index, fill_value=False)
+    motivos = motivos.where(~duplicada, motivos + "cédula duplicada en el archivo; ")
+    rechazo = motivos != ""
+
+    cedulas_vistas.update(cedula[~rechazo])
+
+    validas = lote.loc[~rechazo].copy()
+    validas["edad"] = edad[~rechazo]
+    rechazadas = lote.loc[rechazo].copy()
+    rechazadas["motivo"] = motivos[rechazo].str.rstrip("; ")
+    return validas, rechazadas
+
+
+def validar_lotes(lotes, ruta_reporte, resumen):
+    """Deja pasar solo las filas válidas y agrega las rechazadas al CSV ruta_reporte.
+
+    resumen se actualiza con las claves 'validas' y 'rechazadas'.
+    """
+    cedulas_vistas = set()
+    resumen.update(validas=0, rechazadas=0)
+    if os.path.exists(ruta_reporte):
+        os.remove(ruta_reporte)
+    for lote in lotes:
+        with medir("validacion", filas=len(lote)):
+            validas, rechazadas = validar_lote(lote, cedulas_vistas)
+        if len(rechazadas):
+            rechazadas.to_csv(ruta_reporte, mode="a", index=False, header=resumen["rechazadas"] == 0)
+        resumen["validas"] += len(validas)
+        resumen["rechazadas"] += len(rechazadas)
+        yield validas
+
+
+def insertar_personas_en_lotes(conexion, lotes, version=None):
+    """Inserta los lotes en la tabla personas con SQLAlchemy Core (executemany).
+
+    Si se indica version, las filas se guardan con ese número de cambio (si no, lo asigna
+    un trigger fila por fila). Devuelve una tupla (filas_insertadas, segundos).
+    """
+    inicio = time.perf_counter()
+    sentencia = insert(Persona.__table__)
+    filas_insertadas = 0
+    for lote in lotes:
+        with medir("insercion", filas=len(lote)):
+            registros = _con_version(preparar_lote(lote), version).to_dict("records")
+            if registros:
+                conexion.execute(sentencia, registros)
+        filas_insertadas += len(registros)
+    return filas_insertadas, time.perf_counter() - inicio
+
+
+def _buscar_existentes(conexion, cedulas):
+    """Devuelve {cedula: tupla de valores} de las personas ya guardadas con esas cédulas"""
+    tabla = Persona.__table__
+    columnas = [tabla.c[col] for col in COLUMNAS_REQUERIDAS]
+    existentes = {}
+    for inicio in range(0, len(cedulas), MAX_PARAMETROS_SQLITE):
+        grupo = cedulas[inicio:inicio + MAX_PARAMETROS_SQLITE]
+        for fila in conexion.execute(select(*columnas).where(tabla.c.cedula.in_(grupo))):
+            existentes[fila.cedula] = tuple(fila)
+    return existentes
+
+
+def _con_version(preparado, version):
+    return preparado if version is None else preparado.assign(version=version)
+
+
+def _upsert_lote(conexion, sentencia, lote, resultado, version):
+    """Envía las filas nuevas o cambiadas de un lote y suma los conteos en resultado"""
+    # Si una cédula se repite dentro del lote se queda la última aparición
+    preparado = preparar_lote(lote).drop_duplicates(subset="cedula", keep="last")
+    registros = _con_version(preparado, version).to_dict("records")
+    if not registros:
+        return
+
+    existentes = _buscar_existentes(conexion, [r["cedula"] for r in registros])
+    por_enviar = []
+    for registro in registros:
+        actual = existentes.get(registro["cedula"])
+        if actual is None:
+            resultado["insertadas"] += 1
+        elif actual == tuple(registro[col] for col in COLUMNAS_REQUERIDAS):
+            resultado["sin_cambios"] += 1
+            continue
+        else:
+            resultado["actualizadas"] += 1
+        por_enviar.append(registro)
+
+    if por_enviar:
+        conexion.execute(sentencia, por_enviar)
+
+
+def upsert_personas_en_lotes(conexion, lotes, version=None):
+    """Inserta o actualiza por cédula con INSERT ... ON CONFLICT(cedula) DO UPDATE.
+
+    Las filas idénticas a las ya guardadas no se envían a la base de datos ni cambian de
+    versión; las insertadas o modificadas quedan con version, si se indica.
+    Devuelve un diccionario con insertadas, actualizadas, sin_cambios y segundos.
+    """
+    inicio = time.perf_counter()
+    tabla = Persona.__table__
+    sentencia = sqlite_insert(tabla)
+    columnas_actualizadas = [col for col in COLUMNAS_REQUERIDAS if col != "cedula"]
+    if version is not None:
+        columnas_actualizadas.append("version")
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.cedula],
+        set_={col: sentencia.excluded[col] for col in columnas_actualizadas},
+        # La versión no cuenta como cambio: si solo difiere ella, la fila no se toca
+        where=or_(*[
+            tabla.c[col].is_distinct_from(sentencia.excluded[col])
+            for col in COLUMNAS_REQUERIDAS if col != "cedula"
+        ]),
+    )
+
+    resultado = {"insertadas": 0, "actualizadas": 0, "sin_cambios": 0}
+    for lote in lotes:
+        with medir("upsert", filas=len(lote)):
+            _upsert_lote(conexion, sentencia, lote, resultado, version)
+
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def calcular_hash_archivo(ruta, tamano_bloque=TAMANO_BLOQUE_HASH):
+    """SHA-256 del contenido del archivo, leído por bloques para no cargarlo en memoria"""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def buscar_importacion_previa(conexion, hash_contenido, tamano):
+    """Devuelve la última importación registrada con el mismo contenido, o None"""
+    tabla = Importacion.__table__
+    return conexion.execute(
+        select(tabla)
+        .where(tabla.c.hash_contenido == hash_contenido, tabla.c.tamano == tamano)
+        .order_by(tabla.c.id.desc())
+        .limit(1)
+    ).first()
+
+
+def registrar_importacion(conexion, ruta, hash_contenido, estado_archivo, resultado):
+    """Agrega el archivo al registro de importaciones dentro de la transacción de la carga"""
+    conexion.execute(insert(Importacion.__table__).values(
+        hash_contenido=hash_contenido,
+        archivo=os.path.abspath(ruta),
+        tamano=estado_archivo.st_size,
+        mtime=estado_archivo.st_mtime,
+        filas=resultado["filas"],
+        insertadas=resultado["insertadas"],
+        actualizadas=resultado["actualizadas"],
+        sin_cambios=resultado["sin_cambios"],
+        rechazadas=resultado["rechazadas"],
+        fecha=datetime.datetime.now(),
+    ))
+
+
+def _revisar_registro(engine, ruta, forzar):
+    """Calcula el hash del archivo y busca si ese contenido ya se importó.
+
+    Devuelve (estado_archivo, hash_contenido, importacion_previa); la previa es None si
+    hay que importar el archivo.
+    """
+    estado_archivo = os.stat(ruta)
+    hash_contenido = calcular_hash_archivo(ruta)
+    previa = None
+    if not forzar:
+        with engine.connect() as conexion:
+            previa = buscar_importacion_previa(conexion, hash_contenido, estado_archivo.st_size)
+    return estado_archivo, hash_contenido, previa
+
+
+def _resultado_omitido(previa, inicio):
+    return {
+        "filas": 0, "insertadas": 0, "actualizadas": 0, "sin_cambios": 0, "rechazadas": 0,
+        "ruta_reporte": None, "segundos": time.perf_counter() - inicio, "importacion_previa": previa,
+    }
+
+
+def _abrir_lotes_verificados(ruta, tamano_lote, streaming):
+    """Abre el lector del archivo y revisa las columnas del primer lote antes de seguir.
+
+    Devuelve (generador con todos los lotes, total de filas o None).
+    """
+    # Elegir el lector según la extensión del archivo
+    lotes, total = leer_archivo_por_lotes(ruta, tamano_lote, streaming)
+
+    # Tomar el primer lote para revisar las columnas antes de tocar la base de datos
+    primer_lote = next(lotes, None)
+    if primer_lote is None:
+        raise ArchivoInvalido(f"El archivo {ruta} no contiene filas.")
+
+    # Verificar si todas las columnas necesarias están presentes (ignorando mayúsculas/minúsculas)
+    if not all(col in primer_lote.columns for col in COLUMNAS_REQUERIDAS):
+        lotes.close()
+        raise ArchivoInvalido(
+            f"El archivo {ruta} debe contener las columnas: 'nombre', 'apellido', 'telefono', 'correo', 'edad', 'cedula'."
+        )
+    return itertools.chain([primer_lote], lotes), total
+
+
+def _ruta_reporte(ruta):
+    # Las filas rechazadas se guardan junto al archivo importado
+    return f"{os.path.splitext(ruta)[0]}_rechazados.csv"
+
+
+def _escribir_lotes(conexion, lotes, upsert):
+    """Inserta (o actualiza por cédula) los lotes ya validados y devuelve los conteos.
+
+    Toda la carga comparte un único número de cambio, el siguiente de la secuencia.
+    """
+    version = siguiente_version(conexion)
+    if upsert:
+        resultado = upsert_personas_en_lotes(conexion, lotes, version)
+    else:
+        insertadas, _ = insertar_personas_en_lotes(conexion, lotes, version)
+        resultado = {"insertadas": insertadas, "actualizadas": 0, "sin_cambios": 0}
+    resultado["filas"] = resultado["insertadas"] + resultado["actualizadas"] + resultado["sin_cambios"]
+    return resultado
+
+
+def importar_archivo(ruta, engine, tamano_lote=TAMANO_LOTE, streaming=False, upsert=False,
+                     al_avanzar=None, cancelacion=None, forzar=False):
+    """Lee, valida e inserta (o actualiza por cédula) un archivo completo en una sola transacción.
+
+    al_avanzar(hechas, total) se llama después de cada lote; si cancelacion se activa la
+    transacción se revierte y se lanza ImportacionCancelada. Si un archivo con el mismo
+    contenido ya fue importado se omite, salvo que forzar sea True. Devuelve un diccionario
+    con filas, insertadas, actualizadas, sin_cambios, rechazadas, ruta_reporte, segundos y,
+    si se omitió, 'importacion_previa'. engine debe venir de crear_motor, que ya dejó listo
+    el esquema.
+    """
+    inicio = time.perf_counter()
+
+    # Revisar en el registro si este mismo contenido ya se cargó antes
+    estado_archivo, hash_contenido, previa = _revisar_registro(engine, ruta, forzar)
+    if previa is not None:
+        return _resultado_omitido(previa, inicio)
+
+    lotes, total = _abrir_lotes_verificados(ruta, tamano_lote, streaming)
+    ruta_reporte = _ruta_reporte(ruta)
+    validacion = {}
+
+    # Insertar (o actualizar por cédula) las filas por lotes dentro de una sola transacción;
+    # si se cancela, la excepción sale del bloque y la transacción se revierte
+    with engine.begin() as conexion:
+        todos_los_lotes = validar_lotes(
+            seguir_progreso(
+                lotes,
+                lambda hechas: al_avanzar(hechas, total) if al_avanzar else None,
+                cancelacion or threading.Event(),
+            ),
+            ruta_reporte,
+            validacion,
+        )
+        resultado = _escribir_lotes(conexion, todos_los_lotes, upsert)
+        resultado["rechazadas"] = validacion["rechazadas"]
+        registrar_importacion(conexion, ruta, hash_contenido, estado_archivo, resultado)
+
+    resultado["ruta_reporte"] = ruta_reporte if validacion["rechazadas"] else None
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def parsear_archivo(ruta, tamano_lote=TAMANO_LOTE, streaming=False):
+    """Lee y valida un archivo completo sin tocar la base de datos.
+
+    Se ejecuta en los procesos del pool de importar_archivos; devuelve las filas válidas
+    en un solo DataFrame junto con los rechazos y el tiempo de lectura. Aunque streaming
+    elija el lector por filas de Excel, el archivo entero queda en memoria para enviarlo
+    al proceso principal.
+    """
+    inicio = time.perf_counter()
+    lotes, _ = _abrir_lotes_verificados(ruta, tamano_lote, streaming)
+    ruta_reporte = _ruta_reporte(ruta)
+    validacion = {}
+    validas = pd.concat(list(validar_lotes(lotes, ruta_reporte, validacion)), ignore_index=True)
+    return {
+        "validas": validas,
+        "rechazadas": validacion["rechazadas"],
+        "ruta_reporte": ruta_reporte if validacion["rechazadas"] else None,
+        "segundos_lectura": time.perf_counter() - inicio,
+    }
+
+
+def importar_archivos(rutas, engine, tamano_lote=TAMANO_LOTE, streaming=False, upsert=False,
+                      al_terminar_archivo=None, cancelacion=None, forzar=False, procesos=None):
+    """Importa varios archivos leyéndolos en paralelo con un pool de procesos.
+
+    La lectura y validación (CPU) se reparte entre procesos; la escritura la hace solo este
+    proceso, un archivo por transacción, porque SQLite admite un único escritor. Cada
+    archivo se carga completo en memoria, así que la memoria no es constante ni con
+    streaming; para archivos muy grandes conviene importar_archivo de a uno. Devuelve
+    {ruta: resultado}, donde cada resultado es como el de importar_archivo más
+    'segundos_lectura', o {'error': mensaje} si el archivo falló. Si dos archivos del lote
+    tienen el mismo contenido solo se importa el primero; el otro se omite con
+    'repetido_de' igual a la ruta del primero.
+    al_terminar_archivo(ruta, resultado, hechos, total) se llama al terminar cada archivo.
+    """
+    cancelacion = cancelacion or threading.Event()
+    resultados = {}
+
+    def terminar(ruta, resultado):
+        resultados[ruta] = resultado
+        if al_terminar_archivo:
+            al_terminar_archivo(ruta, resultado, len(resultados), len(rutas))
+
+    # Descartar antes de leer los archivos cuyo contenido ya está en el registro o se
+    # repite dentro del mismo lote
+    pendientes = {}
+    rutas_por_hash = {}
+    for ruta in rutas:
+        inicio = time.perf_counter()
+        try:
+            estado_archivo, hash_contenido, previa = _revisar_registro(engine, ruta, forzar)
+        except OSError as e:
+            terminar(ruta, {"error": str(e)})
+            continue
+        if previa is not None:
+            terminar(ruta, _resultado_omitido(previa, inicio))
+        elif hash_contenido in rutas_por_hash:
+            resultado = _resultado_omitido(None, inicio)
+            resultado["repetido_de"] = rutas_por_hash[hash_contenido]
+            terminar(ruta, resultado)
+        else:
+            rutas_por_hash[hash_contenido] = ruta
+            pendientes[ruta] = (estado_archivo, hash_contenido, inicio)
+
+    if not pendientes:
+        return resultados
+
+    max_procesos = min(len(pendientes), procesos or os.cpu_count() or 1)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_procesos) as pool:
+        futuros = {pool.submit(parsear_archivo, ruta, tamano_lote, streaming): ruta for ruta in pendientes}
+        try:
+            # Escribir cada archivo en cuanto termina de leerse, sin esperar a los demás
+            for futuro in concurrent.futures.as_completed(futuros):
+                if cancelacion.is_set():
+                    raise ImportacionCancelada()
+                ruta = futuros[futuro]
+                estado_archivo, hash_contenido, inicio = pendientes[ruta]
+                try:
+                    parseado = futuro.result()
+                    with engine.begin() as conexion:
+                        resultado = _escribir_lotes(conexion, dividir_en_lotes(parseado["validas"], tamano_lote), upsert)
+                        resultado["rechazadas"] = parseado["rechazadas"]
+                        registrar_importacion(conexion, ruta, hash_contenido, estado_archivo, resultado)
+                except Exception as e:
+                    terminar(ruta, {"error": str(e)})
+                    continue
+                resultado["ruta_reporte"] = parseado["ruta_reporte"]
+                resultado["segundos_lectura"] = parseado["segundos_lectura"]
+                resultado["segundos"] = time.perf_counter() - inicio
+                terminar(ruta, resultado)
+        except ImportacionCancelada:
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+    return resultados
+
+
+def describir_resultado(ruta, resultado):
+    """Arma el mensaje para el usuario con las filas cargadas, el tiempo y los rechazos"""
+    if "error" in resultado:
+        return f"Error al importar {ruta}: {resultado['error']}"
+    if resultado.get("repetido_de"):
+        return (
+            f"El contenido de {ruta} es igual al de {resultado['repetido_de']}, "
+            "que se importa en esta misma carga. No se volvió a cargar."
+        )
+    previa = resultado.get("importacion_previa")
+    if previa is not None:
+        return (
+            f"El contenido de {ruta} ya se importó el {previa.fecha:%Y-%m-%d %H:%M} "
+            f"({previa.filas} filas desde {previa.archivo}). No se volvió a cargar."
+        )
+    filas, segundos = resultado["filas"], resultado["segundos"]
+    filas_por_segundo = filas / segundos if segundos > 0 else float(filas)
+    texto = (
+        f"Datos cargados exitosamente desde {ruta} a la base de datos: "
+        f"{filas} filas en {segundos:.2f} s ({filas_por_segundo:,.0f} filas/s)."
+        f" Insertadas: {resultado['insertadas']}, actualizadas: {resultado['actualizadas']}, "
+        f"sin cambios: {resultado['sin_cambios']}."
+    )
+    if resultado["rechazadas"]:
+        texto += f" Filas rechazadas: {resultado['rechazadas']} (ver {resultado['ruta_reporte']})."
+    return texto
@@ -0,0 +1,93 @@
+"""Registro en memoria de cuánto tardan las consultas SQL y las operaciones de lectura,
+validación, inserción, escritura de Excel y actualización de la interfaz.
+
+Solo se guardan las últimas MAX_OPERACIONES mediciones del proceso actual (un buffer
+circular), así que el registro no crece aunque la aplicación quede abierta días.
+"""
+import collections
+import contextlib
+import datetime
+import threading
+import time
+
+from sqlalchemy import event
+
+# Cantidad de mediciones recientes que se conservan
+MAX_OPERACIONES = 500
+
+# Duración a partir de la cual una operación se considera lenta
+UMBRAL_LENTO_MS = 100
+
+# Largo máximo del detalle guardado (por ejemplo el texto de una consulta SQL)
+MAX_DETALLE = 200
+
+# deque con maxlen descarta solas las más viejas. Se escribe desde varios hilos (importación
+# con asyncio.to_thread, eventos SQL, manejadores de Flet) y recorrerla mientras otro hilo
+# agrega falla, así que toda lectura y escritura pasa por _candado
+_operaciones = collections.deque(maxlen=MAX_OPERACIONES)
+_candado = threading.Lock()
+
+
+def registrar(operacion, segundos, filas=None, detalle=None):
+    """Agrega una medición al buffer de operaciones recientes"""
+    medicion = {
+        "fecha": datetime.datetime.now(),
+        "operacion": operacion,
+        "milisegundos": segundos * 1000,
+        "filas": filas,
+        "detalle": detalle[:MAX_DETALLE] if detalle else None,
+    }
+    with _candado:
+        _operaciones.append(medicion)
+
+
+@contextlib.contextmanager
+def medir(operacion, filas=None, detalle=None):
+    """Mide el bloque y lo registra al salir, aunque termine con una excepción.
+
+    Entrega un diccionario donde el bloque puede completar 'filas' o 'detalle' cuando
+    solo se conocen al final (por ejemplo, las filas leídas de un archivo).
+    """
+    medicion = {"filas": filas, "detalle": detalle}
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        registrar(operacion, time.perf_counter() - inicio, medicion["filas"], medicion["detalle"])
+
+
+def operaciones_recientes():
+    """Copia de las mediciones guardadas, de la más vieja a la más reciente"""
+    with _candado:
+        return list(_operaciones)
+
+
+def operaciones_lentas(umbral_ms=UMBRAL_LENTO_MS):
+    """Mediciones que tardaron al menos umbral_ms, de la más reciente a la más vieja"""
+    return [op for op in reversed(operaciones_recientes()) if op["milisegundos"] >= umbral_ms]
+
+
+def limpiar_operaciones():
+    with _candado:
+        _operaciones.clear()
+
+
+def instrumentar_motor(motor):
+    """Registra la duración y las filas de cada sentencia SQL que ejecuta el engine"""
+
+    @event.listens_for(motor, "before_cursor_execute")
+    def antes_de_ejecutar(conexion, _cursor, _sentencia, _parametros, _contexto, _executemany):
+        # Una pila por conexión, por si una sentencia se ejecuta dentro de otra
+        conexion.info.setdefault("inicios_sql", []).append(time.perf_counter())
+
+    @event.listens_for(motor, "after_cursor_execute")
+    def despues_de_ejecutar(conexion, cursor, sentencia, parametros, _contexto, executemany):
+        segundos = time.perf_counter() - conexion.info["inicios_sql"].pop()
+        if executemany:
+            filas = len(parametros)
+        else:
+            # En un SELECT sqlite3 informa -1 porque las filas aún no se leyeron
+            filas = cursor.rowcount if cursor.rowcount >= 0 else None
+        registrar("sql", segundos, filas, " ".join(sentencia.split()))
+
+    return motor
@@ -0,0 +1,237 @@
+"""Pantalla del combinador de archivos Excel, compartida por las dos aplicaciones (DB.py y main.py)"""
+import os
+
+import flet as ft
+
+from combinador import ErrorLecturaArchivo, combinar_archivos_excel, describir_combinacion, listar_hojas
+
+
+def ventana_combinador(page: ft.Page):
+    """Función principal para la interfaz gráfica de la ruta /exceloption"""
+    page.title = "Combinador de Archivos Excel"
+    page.theme_mode = "light"
+    page.padding = 20
+
+    # Variables para almacenar las rutas de los archivos y la carpeta de destino
+    archivos = []
+    # Casillas de las hojas de cada archivo seleccionado, para elegir cuáles combinar
+    hojas_por_archivo = {}
+    carpeta_destino = None
+    num_hoas = 0  # Definimos esta variable aquí para poder usarla en las funciones internas
+
+    # Función para combinar archivos
+    def combinar_archivos(e):
+        nonlocal num_hoas, archivos, carpeta_destino  # Asegúrate de usar nonlocal si necesitas modificar las variables fuera de la función
+        if len(archivos) < num_hoas:
+            mensaje.value = f"Por favor, selecciona {num_hoas} archivos."
+            page.update()
+            return
+        if not carpeta_destino:
+            mensaje.value = "Por favor, selecciona una carpeta de destino."
+            page.update()
+            return
+        hojas = {
+            archivo: [casilla.label for casilla in casillas if casilla.value]
+            for archivo, casillas in hojas_por_archivo.items()
+        }
+        sin_hojas = [os.path.basename(archivo) for archivo, elegidas in hojas.items() if not elegidas]
+        if sin_hojas:
+            mensaje.value = f"Selecciona al menos una hoja de: {', '.join(sin_hojas)}."
+            page.update()
+            return
+
+        try:
+            # Verificar si openpyxl está instalado
+            try:
+                import openpyxl
+            except ImportError:
+                mensaje.value = "Error: 'openpyxl' no está instalado. Ejecuta 'pip install openpyxl'."
+                page.update()
+                return
+
+            # Combinar los archivos y guardar en un nuevo archivo Excel
+            archivo_salida = f"{carpeta_destino}/archivo_combinado.xlsx"
+            resultado = combinar_archivos_excel(
+                archivos, archivo_salida, streaming=check_streaming.value, paralelo=check_paralelo.value,
+                clave=(input_clave.value or "").strip() or None, tipo_union=selector_union.value,
+                apilar=check_apilar.value, hojas=hojas,
+            )
+            mensaje.value = describir_combinacion(archivo_salida, resultado)
+        except ErrorLecturaArchivo as e:
+            mensaje.value = str(e)
+        except Exception as e:
+            mensaje.value = f"Error: {str(e)}"
+        page.update()
+
+    # Función para manejar la selección de archivos
+    def seleccionar_archivo(e: ft.FilePickerResultEvent):
+        nonlocal archivos  # Asegúrate de que 'archivos' sea modificable
+        if e.files:
+            archivo = e.files[0].path
+            try:
+                # Solo se leen los nombres de las hojas; la primera queda marcada
+                nombres_hojas = listar_hojas(archivo)
+            except ErrorLecturaArchivo as error:
+                mensaje.value = str(error)
+                page.update()
+                return
+            archivos.append(archivo)
+            hojas_por_archivo[archivo] = [
+                ft.Checkbox(label=nombre, value=i == 0) for i, nombre in enumerate(nombres_hojas)
+            ]
+            columna_hojas.controls.append(
+                ft.Row(
+                    [ft.Text(os.path.basename(archivo), weight=ft.FontWeight.BOLD), *hojas_por_archivo[archivo]],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                    wrap=True,
+                )
+            )
+            mensaje.value = f"Archivos seleccionados: {len(archivos)}/{num_hoas}"
+            if len(archivos) == num_hoas:
+                boton_seleccionar_archivo.disabled = True  # Deshabilitar el botón de selección
+                boton_combinar.disabled = False  # Habilitar el botón de combinar
+            page.update()
+        else:
+            mensaje.value = "Ningún archivo seleccionado."
+        page.update()
+
+    # Función para manejar la selección de la carpeta de destino
+    def seleccionar_carpeta_destino(e: ft.FilePickerResultEvent):
+        nonlocal carpeta_destino  # Asegúrate de que 'carpeta_destino' sea modificable
+        if e.path:
+            carpeta_destino = e.path
+            mensaje.value = f"Carpeta de destino seleccionada: {carpeta_destino}"
+            if len(archivos) == num_hoas:
+                boton_combinar.disabled = False  # Habilitar el botón de combinar
+        else:
+            mensaje.value = "Ninguna carpeta seleccionada."
+        page.update()
+
+    # Función para retroceder
+    def retroceder(e):
+        nonlocal num_hoas, archivos  # Modificamos num_hoas y archivos para restablecerlos
+        num_hoas = 0
+        archivos = []
+        hojas_por_archivo.clear()
+        columna_hojas.controls.clear()
+        mensaje.value = "Selecciona cuántas hojas deseas unir."
+        boton_seleccionar_archivo.disabled = False  # Habilitar el botón de selección
+        boton_combinar.disabled = True  # Deshabilitar el botón de combinar
+        page.controls.clear()
+        page.add(contenido_inicial)
+        page.update()
+
+    # Función para avanzar a la selección de archivos
+    def avanzar_seleccion_archivos():
+        nonlocal num_hoas  # Aseguramos que num_hoas es modificable
+        try:
+            num_hoas = int(input_hoas.value)
+            if num_hoas < 1:
+                mensaje.value = "El número de hojas debe ser al menos 1."
+                page.update()
+                return
+            mensaje.value = f"Selecciona {num_hoas} archivos."
+            page.controls.clear()
+            page.add(
+                ft.Column(
+                    [
+                        mensaje,
+                        ft.Row([boton_retroceder], alignment=ft.MainAxisAlignment.CENTER),
+                        ft.Row([boton_seleccionar_archivo], alignment=ft.MainAxisAlignment.CENTER),
+                        ft.Row([boton_seleccionar_carpeta], alignment=ft.MainAxisAlignment.CENTER),
+                        columna_hojas,
+                        ft.Row([input_clave, selector_union], alignment=ft.MainAxisAlignment.CENTER),
+                        ft.Row([check_apilar, check_streaming, check_paralelo], alignment=ft.MainAxisAlignment.CENTER),
+                        ft.Row([boton_combinar], alignment=ft.MainAxisAlignment.CENTER),
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                )
+            )
+            boton_seleccionar_archivo.disabled = False  # Habilitar el botón de selección
+        except ValueError:
+            mensaje.value = "Por favor, ingresa un número válido."
+        page.update()
+
+    # Función para ir a la vista de ExcelOption
+    def ir_a_exceloption(e):
+        page.go("/excelOption")
+
+    # Configurar el FilePicker
+    file_picker = ft.FilePicker(on_result=seleccionar_archivo)
+    folder_picker = ft.FilePicker(on_result=seleccionar_carpeta_destino)
+    page.overlay.extend([file_picker, folder_picker])
+
+    # Elementos de la interfaz
+    mensaje = ft.Text(value="Selecciona cuántas hojas deseas unir.", color="blue")
+    input_hoas = ft.TextField(label="Número de hojas", width=200)
+    boton_confirmar_hoas = ft.ElevatedButton(
+        "Confirmar",
+        on_click=lambda e: avanzar_seleccion_archivos(),
+    )
+    boton_retroceder = ft.ElevatedButton(
+        "Retroceder",
+        on_click=retroceder,
+    )
+    boton_seleccionar_archivo = ft.ElevatedButton(
+        "Seleccionar Archivo",
+        on_click=lambda _: file_picker.pick_files(),
+        disabled=True,  # Deshabilitado inicialmente
+    )
+    boton_seleccionar_carpeta = ft.ElevatedButton(
+        "Seleccionar Carpeta de Destino",
+        on_click=lambda _: folder_picker.get_directory_path(),
+    )
+    columna_hojas = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+    check_streaming = ft.Checkbox(label="Combinar en streaming (memoria constante)", value=False)
+    check_paralelo = ft.Checkbox(label="Leer los archivos en paralelo", value=False)
+    check_apilar = ft.Checkbox(label="Apilar filas (una hoja debajo de otra)", value=False)
+    input_clave = ft.TextField(label="Columna clave (vacío: unir por posición)", width=300)
+    selector_union = ft.Dropdown(
+        label="Tipo de unión",
+        width=220,
+        value="inner",
+        options=[
+            ft.dropdown.Option("inner", "Solo claves en todos"),
+            ft.dropdown.Option("left", "Claves del primero"),
+            ft.dropdown.Option("outer", "Todas las claves"),
+        ],
+    )
+    boton_combinar = ft.ElevatedButton(
+        "Combinar Archivos",
+        on_click=combinar_archivos,
+        disabled=True,  # Deshabilitado inicialmente
+    )
+
+    # Botón para ir a la ruta /exceloption
+    boton_ir_a_exceloption = ft.ElevatedButton(
+        "Ir a ExcelOption",
+        on_click=ir_a_exceloption,
+    )
+
+    boton_volver = ft.ElevatedButton(
+        "Volver",
+        on_click=lambda _: page.go("/"),
+        style=ft.ButtonStyle(
+            bgcolor=ft.colors.RED_500,
+            color=ft.colors.WHITE,
+            shape=ft.RoundedRectangleBorder(radius=8),
+            padding=ft.padding.all(12),
+        ),
+    )
+
+    # Contenido inicial
+    contenido_inicial = ft.Column(
+        [
+            mensaje,
+            input_hoas,
+            ft.Row([boton_confirmar_hoas, boton_retroceder], alignment=ft.MainAxisAlignment.CENTER),
+            boton_ir_a_exceloption,  # Añadir el botón de redirección
+            boton_volver
+        ],
+        alignment=ft.MainAxisAlignment.CENTER,
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+    )
+
+    # Iniciar la ventana con el contenido inicial
+    return ft.View("/excelOption", [contenido_inicial])